@@ -1,23 +1,171 @@
 # cedenar_anomalies/application/inference.py
 
+import json
 import logging
-from pathlib import Path
+from typing import Optional, Tuple
 
+import joblib
 import pandas as pd
+from joblib import Parallel, delayed
 
 from cedenar_anomalies.domain.services.clustering_pipeline_service import (
     PipelineClusterFzz,
     PipelinePuntaje,
 )
-from cedenar_anomalies.utils.paths import data_interim_dir, data_processed_dir
-
-# Configurar logging
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+from cedenar_anomalies.utils.io import (
+    as_categorical,
+    enable_copy_on_write,
+    write_csv_fast,
 )
+from cedenar_anomalies.utils.logging_config import setup_logging
+from cedenar_anomalies.utils.paths import data_interim_dir, data_processed_dir, models_dir
+
 logger = logging.getLogger(__name__)
 
 
+def _inputs_signature(data_path) -> str:
+    """Hash del dataset de entrada y de los modelos en disco.
+
+    Si no cambió ninguno desde la última corrida, la predicción
+    produciría exactamente el mismo resultado y puede omitirse.
+    """
+    parts = []
+    for f in [data_path, *sorted(models_dir().glob("*.pkl"))]:
+        stat = f.stat()
+        parts.append((str(f), stat.st_mtime_ns, stat.st_size))
+    return joblib.hash(parts)
+
+
+def run(df: pd.DataFrame) -> Optional[Tuple[pd.DataFrame, pd.DataFrame]]:
+    """
+    Ejecuta las dos etapas de predicción sobre un DataFrame ya cargado.
+
+    No realiza I/O de archivos, de modo que un orquestador puede encadenar
+    esta función con la preparación del dataset sin pasar por disco.
+
+    Args:
+        df: DataFrame con el dataset de inferencia
+
+    Returns:
+        Tupla (df_predicted_cluster, df_predicted_puntaje), o None si
+        alguna etapa no produjo resultados.
+    """
+    pipe_cluster = PipelineClusterFzz(logger=logger)
+    pipelines_cluster = pipe_cluster.load_pipelines()
+
+    if not pipelines_cluster:
+        logger.error("No se encontraron modelos entrenados para predecir.")
+        return None
+
+    pipe_puntaje = PipelinePuntaje(logger=logger)
+    pipeline_puntaje = pipe_puntaje.load_pipeline()
+
+    if not pipeline_puntaje:
+        logger.error("No se encontraron modelos entrenados para predecir.")
+        return None
+
+    # Fusionar las dos etapas de predicción en una sola pasada por zona:
+    # el bloque de cada zona se mantiene caliente en caché entre la
+    # predicción de cluster y la de puntaje, en lugar de materializar el
+    # frame completo de clusters y volver a recorrerlo
+    def _predict_zone_fused(zona, df_zone):
+        logger.info(f"Prediciendo zona: {zona}")
+        df_zone_cluster = pipe_cluster.predict(pipelines_cluster[zona], df_zone)
+        df_zone_puntaje = pipe_puntaje.predict(pipeline_puntaje, df_zone_cluster)
+        return df_zone_cluster, df_zone_puntaje
+
+    zone_groups = dict(tuple(df.groupby("ZONA", sort=False, observed=True)))
+    zonas_presentes = [zona for zona in pipelines_cluster if zona in zone_groups]
+    zonas_sin_datos = [zona for zona in pipelines_cluster if zona not in zone_groups]
+    if zonas_sin_datos:
+        logger.warning(f"Zonas sin registros en los datos: {zonas_sin_datos}")
+
+    if not zonas_presentes:
+        logger.error("La predicción de cluster no generó resultados.")
+        return None
+
+    results = Parallel(n_jobs=-1, prefer="threads")(
+        delayed(_predict_zone_fused)(zona, zone_groups[zona])
+        for zona in zonas_presentes
+    )
+
+    df_predicted_cluster = pd.concat(
+        [cluster for cluster, _ in results], ignore_index=True
+    )
+    df_predicted_puntaje = pd.concat(
+        [puntaje for _, puntaje in results], ignore_index=True
+    )
+
+    if df_predicted_puntaje.empty:
+        logger.error("La predicción de puntaje no generó resultados.")
+        return None
+
+    df_predicted_puntaje["Usuario"] = df_predicted_puntaje["Usuario"].fillna(
+        df_predicted_puntaje["PRODUCTO"]
+    )
+
+    return df_predicted_cluster, df_predicted_puntaje
+
+
+def write_outputs(
+    df_predicted_cluster: pd.DataFrame, df_predicted_puntaje: pd.DataFrame
+) -> None:
+    """
+    Persiste los resultados de la predicción.
+
+    Escribe el artefacto intermedio de clusters, el resultado completo en
+    Parquet y el CSV proyectado que consumen BigQuery/Sheets.
+    """
+    # Marca de tiempo calculada una sola vez, en formato ISO compacto sin
+    # espacios ni dos puntos (seguro para nombres de archivo)
+    run_stamp = pd.Timestamp.now().strftime("%Y%m%dT%H%M%S")
+
+    # Construir todas las rutas de salida una sola vez
+    output_sheet_path = data_interim_dir("dataset_inference.csv")
+    output_path = data_processed_dir(f"dataset_inference_{run_stamp}.parquet")
+    cluster_path = data_interim_dir("dataset_cluster.parquet")
+    errores_path = data_interim_dir("errores_inference.parquet")
+
+    df_predicted_cluster.to_parquet(cluster_path, compression="zstd")
+
+    df_predicted_puntaje.to_parquet(output_path, compression="zstd")
+
+    cols_sheet = [
+        "Usuario",
+        "Ejecucion",
+        "AREA",
+        "PLAN_COMERCIAL",
+        "Nombre",
+        "kWh Rec",
+        "cluster_id",
+        "puntaje",
+        "puntaje_1",
+        "puntaje_2",
+        "puntaje_3",
+        "puntaje_4",
+        "puntaje_5",
+        "LATI_USU",
+        "LONG_USU",
+        "ZONA",
+    ]
+
+    # Calcular la máscara de filas inválidas una sola vez y usarla tanto
+    # para el archivo de errores como para el filtrado
+    key_cols = ["AREA", "PLAN_COMERCIAL", "LATI_USU", "LONG_USU", "ZONA"]
+    mask_bad = df_predicted_puntaje[key_cols].isna().to_numpy().any(axis=1)
+    df_predicted_puntaje.loc[mask_bad].to_parquet(errores_path, compression="zstd")
+    # Proyectar a las columnas de la hoja antes de deduplicar y escribir,
+    # para no arrastrar el resto del frame por el dedup ni el formateo CSV.
+    # La huella uint64 por fila hace que el dedup compare claves de 8 bytes
+    # en lugar de cada celda de las columnas mixtas de la hoja
+    df_sheet = df_predicted_puntaje.loc[~mask_bad, cols_sheet]
+    fingerprint = pd.util.hash_pandas_object(df_sheet, index=False)
+    df_sheet = df_sheet.loc[~fingerprint.duplicated().to_numpy()]
+    write_csv_fast(df_sheet, output_sheet_path)
+
+    logger.info(f"Predicción completada y guardada en: {output_path}")
+
+
 def main():
     """
     Función principal para predecir clusters por zona usando modelos previamente entrenados.
@@ -26,19 +174,33 @@ def main():
 
     # --- Configuración ---
 
-    processed_output = "dataset_to_inference.csv"
-    data_path = data_interim_dir(processed_output)
-
-    output_sheet_path = data_interim_dir("dataset_inference.csv")
-    output_path = data_processed_dir(f"dataset_inference_{pd.Timestamp.now()}.csv")
+    data_path = data_interim_dir("dataset_to_inference.parquet")
 
-    if not Path(data_path).exists():
+    if not data_path.exists():
         logger.error(f"Archivo de predicción no encontrado: {data_path}")
         return
 
+    # --- Cortocircuito: entradas y modelos sin cambios ---
+    signature = _inputs_signature(data_path)
+    state_path = data_interim_dir(".cache", "inference_state.json")
+    if state_path.exists() and data_interim_dir("dataset_inference.csv").exists():
+        try:
+            previous = json.loads(state_path.read_text()).get("signature")
+        except (OSError, json.JSONDecodeError) as e:
+            # Un archivo de estado ilegible o corrupto no debe bloquear la
+            # corrida: se trata como caché inválida y se vuelve a predecir
+            logger.warning(f"Estado de inferencia ilegible ({e}); se recalcula.")
+            previous = None
+        if previous == signature:
+            logger.info(
+                "Entradas y modelos sin cambios desde la última corrida; "
+                "se omite la predicción."
+            )
+            return
+
     # --- Cargar datos ---
     try:
-        df = pd.read_csv(data_path)
+        df = as_categorical(pd.read_parquet(data_path))
         logger.info(f"Datos de entrada cargados correctamente. Shape: {df.shape}")
     except Exception as e:
         logger.exception(f"Error al cargar archivo de predicción: {e}")
@@ -46,81 +208,22 @@ def main():
 
     # --- Cargar modelos y realizar predicciones de clusters por zona ---
     try:
-        pipe_cluster = PipelineClusterFzz(logger=logger)
-        pipelines_cluster = pipe_cluster.load_pipelines()
-
-        if not pipelines_cluster:
-            logger.error("No se encontraron modelos entrenados para predecir.")
-            return
-
-        df_predicted_cluster = pipe_cluster.predict_all_zones(df, pipelines_cluster)
-
-        if df_predicted_cluster.empty:
-            logger.error("La predicción de cluster no generó resultados.")
-            return
-
-        df_predicted_cluster.to_csv(data_interim_dir("dataset_cluster.csv"), index=False)
-
-        pipe_puntaje = PipelinePuntaje(logger=logger)
-        pipeline_puntaje = pipe_puntaje.load_pipeline()
-
-        if not pipeline_puntaje:
-            logger.error("No se encontraron modelos entrenados para predecir.")
+        result = run(df)
+        if result is None:
             return
 
-        df_predicted_puntaje = pipe_puntaje.predict(
-            pipeline_puntaje, df_predicted_cluster
-        )
-
-        if df_predicted_puntaje.empty:
-            logger.error("La predicción de puntaje no generó resultados.")
-            return
+        df_predicted_cluster, df_predicted_puntaje = result
+        write_outputs(df_predicted_cluster, df_predicted_puntaje)
 
-        df_predicted_puntaje["Usuario"] = df_predicted_puntaje["Usuario"].fillna(
-            df_predicted_puntaje["PRODUCTO"]
-        )
-
-        df_predicted_puntaje.to_csv(output_path, index=False)
-
-        cols_sheet = [
-            "Usuario",
-            "Ejecucion",
-            "AREA",
-            "PLAN_COMERCIAL",
-            "Nombre",
-            "kWh Rec",
-            "cluster_id",
-            "puntaje",
-            "puntaje_1",
-            "puntaje_2",
-            "puntaje_3",
-            "puntaje_4",
-            "puntaje_5",
-            "LATI_USU",
-            "LONG_USU",
-            "ZONA",
-        ]
-
-        df_predicted_puntaje[
-            df_predicted_puntaje[
-                ["AREA", "PLAN_COMERCIAL", "LATI_USU", "LONG_USU", "ZONA"]
-            ]
-            .isna()
-            .any(axis=1)
-        ].to_csv(data_interim_dir("errores_inference.csv"), index=False)
-        df_predicted_puntaje = df_predicted_puntaje.dropna(
-            subset=["AREA", "PLAN_COMERCIAL", "LATI_USU", "LONG_USU", "ZONA"]
-        ).copy()
-        df_predicted_puntaje = df_predicted_puntaje.drop_duplicates(
-            subset=cols_sheet
-        ).copy()
-        df_predicted_puntaje[cols_sheet].to_csv(output_sheet_path, index=False)
-
-        logger.info(f"Predicción completada y guardada en: {output_path}")
+        # Registrar la firma de esta corrida para el cortocircuito
+        state_path.parent.mkdir(parents=True, exist_ok=True)
+        state_path.write_text(json.dumps({"signature": signature}))
 
     except Exception as e:
         logger.exception(f"Error durante el proceso de predicción: {e}")
 
 
 if __name__ == "__main__":
+    setup_logging()
+    enable_copy_on_write()
     main()
@@ -6,12 +6,10 @@ from cedenar_anomalies.domain.services.inference_service import InferenceService
 from cedenar_anomalies.infrastructure.adapters.repositories.sql_inference_repository import (
     SQLInferenceRepository,
 )
+from cedenar_anomalies.utils.io import enable_copy_on_write
+from cedenar_anomalies.utils.logging_config import setup_logging
 from cedenar_anomalies.utils.paths import data_processed_dir
 
-# Configurar logging
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
-)
 logger = logging.getLogger(__name__)
 
 
@@ -45,4 +43,6 @@ def main():
 
 
 if __name__ == "__main__":
+    setup_logging()
+    enable_copy_on_write()
     main()
@@ -7,12 +7,10 @@ from cedenar_anomalies.domain.services.anomalia_service import AnomaliaService
 from cedenar_anomalies.infrastructure.adapters.repositories.sql_anomalia_repository import (
     SQLAnomaliaRepository,
 )
+from cedenar_anomalies.utils.io import enable_copy_on_write
+from cedenar_anomalies.utils.logging_config import setup_logging
 from cedenar_anomalies.utils.paths import data_processed_dir
 
-# Configurar logging
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
-)
 logger = logging.getLogger(__name__)
 
 
@@ -24,7 +22,7 @@ def main():
         "--file",
         type=str,
         help="Ruta al archivo CSV",
-        default=data_processed_dir("dataset_limpio_2022.csv"),
+        default=data_processed_dir("dataset_limpio_2022.parquet"),
     )
     parser.add_argument("--year", type=int, help="Año de los datos", default=2022
                         )
@@ -47,4 +45,6 @@ def main():
 
 
 if __name__ == "__main__":
+    setup_logging()
+    enable_copy_on_write()
     main()
@@ -1,7 +1,10 @@
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
 
-import pandas as pd
+import pyarrow as pa
+from joblib import Memory
 
 from cedenar_anomalies.domain.services.data_cleaning_service import DataCleaningService
 from cedenar_anomalies.domain.services.data_processing_service import (
@@ -9,14 +12,59 @@ from cedenar_anomalies.domain.services.data_processing_service import (
 )
 
 # Importar utilidades para gestión de rutas
-from cedenar_anomalies.utils.paths import data_processed_dir, data_raw_dir
-
-# Configurar logging
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+from cedenar_anomalies.utils.io import (
+    enable_copy_on_write,
+    read_csv_pushdown,
+    read_excel_cached,
+    read_optional,
 )
+from cedenar_anomalies.utils.logging_config import setup_logging
+from cedenar_anomalies.utils.paths import data_interim_dir, data_processed_dir, data_raw_dir
+
 logger = logging.getLogger(__name__)
 
+# Caché en disco para las etapas deterministas del pipeline
+mem = Memory(location=data_interim_dir(".cache"), verbose=0)
+
+
+def _file_signature(path) -> tuple:
+    """Firma liviana de un archivo (ruta, mtime, tamaño) para claves de caché."""
+    stat = Path(path).stat()
+    return (str(path), stat.st_mtime_ns, stat.st_size)
+
+
+@mem.cache(ignore=["anomalies_df", "users_df", "plain_df", "uid_conversion_df"])
+def _process(
+    input_signature,
+    target_year,
+    item_ids,
+    anomalies_df,
+    users_df,
+    plain_df,
+    uid_conversion_df,
+):
+    """Etapa de procesamiento cacheada por la firma de los archivos de entrada."""
+    processing_service = DataProcessingService(target_year=target_year, logger=logger)
+    processing_service.item_ids = item_ids
+    return processing_service.process_data(
+        anomalies_df=anomalies_df,
+        users_df=users_df,
+        plain_df=plain_df,
+        uid_conversion_df=uid_conversion_df,
+    )
+
+
+@mem.cache(ignore=["df"])
+def _clean(input_signature, target_year, item_ids, columns_to_keep, output_filename, df):
+    """Etapa de limpieza cacheada por la firma de los archivos de entrada."""
+    cleaning_service = DataCleaningService(
+        df=df,
+        output_filename=output_filename,
+        columns_to_keep=columns_to_keep,
+        logger=logger,
+    )
+    return cleaning_service.clean()
+
 
 def main():
     """
@@ -35,8 +83,16 @@ def main():
         # Definir parámetros de procesamiento
         target_year = 2022
 
-        # Definir lista de IDs de ítems
-        item_ids = [
+        # Columnas del archivo plano que realmente consume el procesamiento;
+        # proyectarlas en la lectura evita materializar el resto del CSV.
+        # Declarar los tipos de las claves ahorra la pasada de inferencia
+        # ("value" queda sin declarar: mezcla texto y números según el ítem)
+        plain_columns = ["id", "odt", "value"]
+        plain_column_types = {"id": pa.int64(), "odt": pa.int64()}
+
+        # Definir IDs de ítems (frozenset: los tests de pertenencia aguas
+        # abajo son O(1) en lugar de recorrer una lista)
+        item_ids = frozenset([
             1442,
             8,
             237,
@@ -84,6 +140,22 @@ def main():
             1331,
             202,
             1349,
+        ])
+
+        # Sólo las filas de estos ids del archivo plano se usan aguas abajo;
+        # empujar el filtro al lector evita materializar el resto de filas
+        plain_filters = [
+            (
+                "id",
+                "in",
+                sorted(
+                    {
+                        DataProcessingService.ZONA_ID,
+                        DataProcessingService.ODT_NUMBER_ID,
+                        *item_ids,
+                    }
+                ),
+            )
         ]
 
         # Definir columnas a mantener después de limpieza
@@ -120,13 +192,13 @@ def main():
         ]
 
         # Configuración para archivos de salida
-        processed_output = f"dataset_decantado_{target_year}.csv"
-        cleaned_output = f"dataset_limpio_{target_year}.csv"
+        processed_output = f"dataset_decantado_{target_year}.parquet"
+        cleaned_output = f"dataset_limpio_{target_year}.parquet"
         # --- Fin de Configuración ---
 
         logger.info("Configuración cargada con éxito.")
         logger.info(f"  Año objetivo: {target_year}")
-        logger.info(f"  IDs de ítems: {item_ids}")
+        logger.debug("  IDs de ítems (%d): %s", len(item_ids), sorted(item_ids))
         logger.info(f"  Archivo de datos planos: {plain_data_filename}")
         logger.info(f"  Archivo de datos de usuario: {user_data_filename}")
         logger.info(f"  Archivo de conversión UID: {uid_conv_filename}")
@@ -141,29 +213,31 @@ def main():
         user_file = data_raw_dir(user_data_filename)
         uid_conv_file = data_raw_dir(uid_conv_filename)
 
-        # Cargar datos usando pandas directamente
-        anomalies_df = (
-            pd.read_excel(anomalies_file) if Path(anomalies_file).exists() else None
-        )
-        plain_df = (
-            pd.read_csv(plain_file, low_memory=False)
-            if Path(plain_file).exists()
-            else None
-        )
-
-        try:
-            users_df = pd.read_excel(user_file) if Path(user_file).exists() else None
-        except Exception as e:
-            logger.warning(f"Error al cargar archivo de usuarios: {e}")
-            users_df = None
-
-        try:
-            uid_conversion_df = (
-                pd.read_excel(uid_conv_file) if Path(uid_conv_file).exists() else None
+        # Las cuatro cargas son independientes y liberan el GIL en los
+        # parsers nativos, así que se despachan en paralelo
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            future_anomalies = executor.submit(
+                read_optional, read_excel_cached, anomalies_file
+            )
+            future_plain = executor.submit(
+                read_optional,
+                partial(
+                    read_csv_pushdown,
+                    columns=plain_columns,
+                    column_types=plain_column_types,
+                    filters=plain_filters,
+                ),
+                plain_file,
             )
-        except Exception as e:
-            logger.warning(f"Error al cargar archivo de conversión UID: {e}")
-            uid_conversion_df = None
+            future_users = executor.submit(read_optional, read_excel_cached, user_file)
+            future_uid = executor.submit(
+                read_optional, read_excel_cached, uid_conv_file
+            )
+
+        anomalies_df = future_anomalies.result()
+        plain_df = future_plain.result()
+        users_df = future_users.result()
+        uid_conversion_df = future_uid.result()
 
         if anomalies_df is None:
             logger.error(f"No se pudo cargar el archivo de anomalías: {anomalies_file}")
@@ -177,15 +251,19 @@ def main():
         # --- Paso 2: Procesar datos ---
         logger.info("Iniciando procesamiento de datos...")
 
-        # Crear servicio de procesamiento con solo los parámetros que acepta
-        processing_service = DataProcessingService(target_year=target_year, logger=logger)
-
-        # Asignar la lista de item_ids al servicio directamente (si existe el atributo)
-        # NOTA: Si esto causa problemas, es necesario modificar DataProcessingService
-        processing_service.item_ids = item_ids
+        # Firma de los archivos de entrada: las etapas cacheadas se invalidan
+        # sólo cuando cambia algún archivo o parámetro de configuración
+        input_signature = tuple(
+            _file_signature(f)
+            for f in (anomalies_file, plain_file, user_file, uid_conv_file)
+            if Path(f).exists()
+        )
 
-        # Procesar datos
-        processed_df = processing_service.process_data(
+        # Procesar datos (con caché en disco)
+        processed_df = _process(
+            input_signature,
+            target_year,
+            item_ids,
             anomalies_df=anomalies_df,
             users_df=users_df,
             plain_df=plain_df,
@@ -202,7 +280,7 @@ def main():
 
         # Guardar datos procesados directamente con pandas
         processed_output_path = data_processed_dir(processed_output)
-        processed_df.to_csv(processed_output_path, index=False)
+        processed_df.to_parquet(processed_output_path, compression="zstd")
         logger.info(f"Dataset procesado guardado en: {processed_output_path}")
 
         logger.info("Reporte de procesamiento generado")
@@ -210,24 +288,23 @@ def main():
         # --- Paso 3: Limpiar datos ---
         logger.info("Iniciando fase de limpieza de datos...")
 
-        # Crear servicio de limpieza
-        cleaning_service = DataCleaningService(
+        # Ejecutar limpieza (con caché en disco)
+        cleaned_df = _clean(
+            input_signature,
+            target_year,
+            item_ids,
+            columns_to_keep,
+            cleaned_output,
             df=processed_df,
-            output_filename=cleaned_output,
-            columns_to_keep=columns_to_keep,
-            logger=logger,
         )
 
-        # Ejecutar limpieza
-        cleaned_df = cleaning_service.clean()
-
         if cleaned_df is None or cleaned_df.empty:
             logger.error("La limpieza no retornó un DataFrame válido. Abortando.")
             return
 
         # Guardar datos limpios directamente con pandas
         cleaned_output_path = data_processed_dir(cleaned_output)
-        cleaned_df.to_csv(cleaned_output_path, index=False)
+        cleaned_df.to_parquet(cleaned_output_path, compression="zstd")
 
         logger.info("Proceso completo finalizado con éxito.")
         logger.info(f"Dataset limpio guardado en: {cleaned_output_path}")
@@ -250,4 +327,6 @@ def main():
 
 
 if __name__ == "__main__":
+    setup_logging()
+    enable_copy_on_write()
     main()
@@ -1,5 +1,5 @@
 import logging
-from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 
 import pandas as pd
 
@@ -8,18 +8,23 @@ from cedenar_anomalies.domain.services.data_processing_service import (
 )
 
 # Importar utilidades para gestión de rutas
+from cedenar_anomalies.utils.io import (
+    enable_copy_on_write,
+    read_excel_cached,
+    read_optional,
+)
+from cedenar_anomalies.utils.logging_config import setup_logging
 from cedenar_anomalies.utils.paths import data_interim_dir, data_raw_dir
 
-# Configurar logging
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
-)
 logger = logging.getLogger(__name__)
 
 
-def main():
+def build():
     """
-    Función principal para configurar y ejecutar el procesamiento de datos.
+    Carga los archivos de entrada y construye el dataset de inferencia.
+
+    No escribe en disco; devuelve el DataFrame procesado (o None si
+    alguna etapa falla) para que pueda encadenarse en memoria.
     """
     logger.info("Iniciando procesamiento de datos con arquitectura hexagonal...")
 
@@ -30,10 +35,6 @@ def main():
         ponderado_filename = "items anomalia ponderado.xlsx"
         anomalies_filename = "anomalias 2022 23 y 24.xlsx"
 
-        # Configuración para archivos de salida
-        processed_output = "dataset_to_inference.csv"
-        # --- Fin de Configuración ---
-
         logger.info("Configuración cargada con éxito.")
         logger.info(f"  Archivo de datos de usuario: {user_data_filename}")
         logger.info(f"  Archivo de conversión UID: {ponderado_filename}")
@@ -47,28 +48,23 @@ def main():
         user_file = data_raw_dir(user_data_filename)
         ponderado_file = data_raw_dir(ponderado_filename)
 
-        # Cargar datos usando pandas directamente
-        anomalies_df = (
-            pd.read_excel(anomalies_file) if Path(anomalies_file).exists() else None
-        )
-
-        try:
-            users_df = pd.read_excel(user_file) if Path(user_file).exists() else None
-        except Exception as e:
-            logger.warning(f"Error al cargar archivo de usuarios: {e}")
-            users_df = None
-
-        try:
-            ponderado_df = (
-                pd.read_excel(ponderado_file) if Path(ponderado_file).exists() else None
+        # Las tres cargas son independientes, así que se despachan en paralelo
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            future_anomalies = executor.submit(
+                read_optional, read_excel_cached, anomalies_file
             )
-        except Exception as e:
-            logger.warning(f"Error al cargar archivo de conversión UID: {e}")
-            ponderado_df = None
+            future_users = executor.submit(read_optional, read_excel_cached, user_file)
+            future_ponderado = executor.submit(
+                read_optional, read_excel_cached, ponderado_file
+            )
+
+        anomalies_df = future_anomalies.result()
+        users_df = future_users.result()
+        ponderado_df = future_ponderado.result()
 
         if anomalies_df is None:
             logger.error(f"No se pudo cargar el archivo de anomalías: {anomalies_file}")
-            return
+            return None
 
         logger.info("Datos cargados con éxito.")
 
@@ -87,18 +83,13 @@ def main():
 
         if processed_df is None or processed_df.empty:
             logger.error("El procesamiento no retornó un DataFrame válido. Abortando.")
-            return
+            return None
 
         logger.info(
             f"Procesamiento inicial completado. DataFrame shape: {processed_df.shape}"
         )
 
-        # Guardar datos procesados directamente con pandas
-        processed_output_path = data_interim_dir(processed_output)
-        processed_df.to_csv(processed_output_path, index=False)
-        logger.info(f"Dataset procesado guardado en: {processed_output_path}")
-
-        logger.info("Reporte de procesamiento generado")
+        return processed_df
 
     except FileNotFoundError as e:
         logger.error(
@@ -115,6 +106,27 @@ def main():
             f"Ocurrió un error inesperado durante el procesamiento: {e}", exc_info=True
         )
 
+    return None
+
+
+def main():
+    """
+    Función principal para configurar y ejecutar el procesamiento de datos.
+    """
+    processed_df = build()
+
+    if processed_df is None:
+        return
+
+    # Guardar datos procesados directamente con pandas
+    processed_output_path = data_interim_dir("dataset_to_inference.parquet")
+    processed_df.to_parquet(processed_output_path, compression="zstd")
+    logger.info(f"Dataset procesado guardado en: {processed_output_path}")
+
+    logger.info("Reporte de procesamiento generado")
+
 
 if __name__ == "__main__":
+    setup_logging()
+    enable_copy_on_write()
     main()
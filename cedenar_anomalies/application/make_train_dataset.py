@@ -1,5 +1,5 @@
 import logging
-from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 
 import pandas as pd
 
@@ -8,12 +8,14 @@ from cedenar_anomalies.domain.services.data_processing_service import (
 )
 
 # Importar utilidades para gestión de rutas
+from cedenar_anomalies.utils.io import (
+    enable_copy_on_write,
+    read_excel_cached,
+    read_optional,
+)
+from cedenar_anomalies.utils.logging_config import setup_logging
 from cedenar_anomalies.utils.paths import data_raw_dir, data_interim_dir
 
-# Configurar logging
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
-)
 logger = logging.getLogger(__name__)
 
 
@@ -31,7 +33,7 @@ def main():
         anomalies_filename = "anomalias 2022 23 y 24.xlsx"
 
         # Configuración para archivos de salida
-        processed_output = "01_dataset_train_clean.csv"
+        processed_output = "01_dataset_train_clean.parquet"
         # --- Fin de Configuración ---
 
         logger.info("Configuración cargada con éxito.")
@@ -47,24 +49,19 @@ def main():
         user_file = data_raw_dir(user_data_filename)
         ponderado_file = data_raw_dir(ponderado_filename)
 
-        # Cargar datos usando pandas directamente
-        anomalies_df = (
-            pd.read_excel(anomalies_file) if Path(anomalies_file).exists() else None
-        )
-
-        try:
-            users_df = pd.read_excel(user_file) if Path(user_file).exists() else None
-        except Exception as e:
-            logger.warning(f"Error al cargar archivo de usuarios: {e}")
-            users_df = None
-
-        try:
-            ponderado_df = (
-                pd.read_excel(ponderado_file) if Path(ponderado_file).exists() else None
+        # Las tres cargas son independientes, así que se despachan en paralelo
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            future_anomalies = executor.submit(
+                read_optional, read_excel_cached, anomalies_file
+            )
+            future_users = executor.submit(read_optional, read_excel_cached, user_file)
+            future_ponderado = executor.submit(
+                read_optional, read_excel_cached, ponderado_file
             )
-        except Exception as e:
-            logger.warning(f"Error al cargar archivo de conversión UID: {e}")
-            ponderado_df = None
+
+        anomalies_df = future_anomalies.result()
+        users_df = future_users.result()
+        ponderado_df = future_ponderado.result()
 
         if anomalies_df is None:
             logger.error(f"No se pudo cargar el archivo de anomalías: {anomalies_file}")
@@ -95,7 +92,7 @@ def main():
 
         # Guardar datos procesados directamente con pandas
         processed_output_path = data_interim_dir(processed_output)
-        processed_df.to_csv(processed_output_path, index=False)
+        processed_df.to_parquet(processed_output_path, compression="zstd")
         logger.info(f"Dataset procesado guardado en: {processed_output_path}")
 
         logger.info("Reporte de procesamiento generado")
@@ -117,4 +114,6 @@ def main():
 
 
 if __name__ == "__main__":
+    setup_logging()
+    enable_copy_on_write()
     main()
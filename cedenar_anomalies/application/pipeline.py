@@ -0,0 +1,42 @@
+# cedenar_anomalies/application/pipeline.py
+
+import logging
+
+from cedenar_anomalies.utils.io import enable_copy_on_write
+from cedenar_anomalies.utils.logging_config import setup_logging
+
+from cedenar_anomalies.application import inference, make_inference_dataset
+
+logger = logging.getLogger(__name__)
+
+
+def main():
+    """
+    Orquesta la preparación del dataset y la inferencia en un solo proceso.
+
+    A diferencia de ejecutar make_inference_dataset.py e inference.py por
+    separado, el DataFrame se pasa en memoria entre etapas, eliminando un
+    ciclo completo de serialización y parseo en disco.
+    """
+    logger.info("Iniciando pipeline de inferencia en memoria...")
+
+    df = make_inference_dataset.build()
+    if df is None:
+        logger.error("La preparación del dataset falló. Abortando pipeline.")
+        return
+
+    result = inference.run(df)
+    if result is None:
+        logger.error("La inferencia no generó resultados. Abortando pipeline.")
+        return
+
+    df_predicted_cluster, df_predicted_puntaje = result
+    inference.write_outputs(df_predicted_cluster, df_predicted_puntaje)
+
+    logger.info("Pipeline de inferencia completado.")
+
+
+if __name__ == "__main__":
+    setup_logging()
+    enable_copy_on_write()
+    main()
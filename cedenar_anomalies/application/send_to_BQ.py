@@ -1,3 +1,5 @@
+from concurrent.futures import ThreadPoolExecutor
+
 import pandas as pd
 from google.cloud import bigquery
 from google.oauth2 import service_account  # Para cargar credenciales explícitamente
@@ -17,208 +19,292 @@ DATASET_ID = "Datos_IA_LK"  # Extraído de la imagen
 TABLE_NAME = "Datos_Inference"  # Nombre de la tabla destino en BigQuery (igual que el dataset para este ejemplo)
 TABLE_ID = f"{PROJECT_ID}.{DATASET_ID}.{TABLE_NAME}"
 
-# --- 1. Autenticación y creación del cliente de BigQuery ---
-try:
-    credentials = service_account.Credentials.from_service_account_file(
-        ARCHIVO_CREDENCIALES_JSON,
-        scopes=["https://www.googleapis.com/auth/cloud-platform"],
-    )
-    client = bigquery.Client(credentials=credentials, project=PROJECT_ID)
-    print(f"Cliente de BigQuery inicializado para el proyecto '{PROJECT_ID}'.")
-except Exception as e:
-    print(f"Error de autenticación o al crear el cliente de BigQuery: {e}")
-    exit()
-
-# --- 2. Leer los datos del archivo CSV usando Pandas ---
-try:
-    df = pd.read_csv(ARCHIVO_CSV, encoding="utf-8")
-    print(
-        f"Datos leídos de '{ARCHIVO_CSV}'. Filas: {len(df)}, Columnas: {len(df.columns)}"
-    )
-
-    if df.empty:
-        print(f"El archivo CSV '{ARCHIVO_CSV}' está vacío. No hay datos para subir.")
-        exit()
-
-    # --- Renombrar cluster_id a Cluster ---
-    if "cluster_id" in df.columns:
-        df.rename(columns={"cluster_id": "Cluster"}, inplace=True)
-        print("Columna 'cluster_id' renombrada a 'Cluster'.")
-    else:
-        print("Advertencia: Columna 'cluster_id' no encontrada en el CSV para renombrar.")
-
-    if "kWh Rec" in df.columns:
-        df.rename(columns={"kWh Rec": "kWh_Rec"}, inplace=True)
-        print("Columna 'kWh Rec' renombrada a 'kWh_Rec'.")
-    else:
-        print("Advertencia: Columna 'kWh Rec' no encontrada en el CSV para renombrar.")
-
-    # --- Preprocesamiento de datos y conversión de tipos en Pandas ---
-
-    # Columnas esperadas y sus tipos BQ (basado en tu imagen)
-    # Hacer una copia para no modificar el df original innecesariamente hasta el final
-    df_procesado = pd.DataFrame()
-
-    # STRING Types
-    string_cols = ["AREA", "Cluster", "Nombre", "PLAN_COMERCIAL", "ZONA"]
-    for col in string_cols:
-        if col in df.columns:
-            df_procesado[col] = (
-                df[col].astype(str).replace("nan", None)
-            )  # Convertir 'nan' string a None
-        else:
-            print(f"Advertencia: Columna '{col}' no encontrada en el CSV. Se omitirá.")
-
-    # INTEGER Types (usando Int64Dtype para soportar NaNs como pd.NA)
-    integer_cols = ["puntaje", "Usuario"]
-    for col in integer_cols:
-        if col in df.columns:
-            # Primero convertir a numérico, errores a NaN
-            numeric_col = pd.to_numeric(df[col], errors="coerce")
-            # Luego convertir a Int64Dtype, que maneja NaN como pd.NA
-            df_procesado[col] = numeric_col.astype(pd.Int64Dtype())
-        else:
-            print(f"Advertencia: Columna '{col}' no encontrada en el CSV. Se omitirá.")
-
-    # NUMERIC Types (FLOAT64 en Pandas, FLOAT en BQ)
-    # 'Usuario' lo trato como FLOAT por si tiene decimales, si es INTEGER, BQ lo manejará.
-    # O puedes usar pd.Int64Dtype() para enteros con NaNs si es necesario.
-    float_cols = [
-        "kWh_Rec",
-        "LATI_USU",
-        "LONG_USU",
-        "puntaje_1",
-        "puntaje_2",
-        "puntaje_3",
-        "puntaje_4",
-        "puntaje_5",
-    ]
-    for col in float_cols:
-        if col in df.columns:
-            df_procesado[col] = pd.to_numeric(
-                df[col], errors="coerce"
-            )  # 'coerce' convierte errores a NaT/NaN
-        else:
-            print(f"Advertencia: Columna '{col}' no encontrada en el CSV. Se omitirá.")
-
-    # DATE Type for 'Ejecucion'
-    if "Ejecucion" in df.columns:
-        # Intenta convertir a datetime, errores se convertirán a NaT (Not a Time)
-        # BigQuery espera objetos date, no datetime, para el tipo DATE.
-        df_procesado["Ejecucion"] = pd.to_datetime(
-            df["Ejecucion"], errors="coerce"
-        ).dt.date
-    else:
-        print("Advertencia: Columna 'Ejecucion' no encontrada en el CSV. Se omitirá.")
-
-    # Asegurarnos de que todas las columnas que BigQuery espera estén en el DataFrame
-    # y en el orden correcto para el esquema definido (aunque BQ carga por nombre).
-    # Este es el orden de tu imagen, que usaremos para el schema.
-    column_order_for_bq = [
-        "AREA",
-        "Cluster",
-        "Ejecucion",
-        "kWh_Rec",
-        "LATI_USU",
-        "LONG_USU",
-        "Nombre",
-        "PLAN_COMERCIAL",
-        "puntaje",
-        "puntaje_1",
-        "puntaje_2",
-        "puntaje_3",
-        "puntaje_4",
-        "puntaje_5",
-        "Usuario",
-        "ZONA",
-    ]
-
-    # Reordenar y seleccionar solo las columnas necesarias
-    # Si alguna columna falta en df_procesado, se añadirá con None/NaN
-    df_para_subir = pd.DataFrame()
-    for col_name in column_order_for_bq:
-        if col_name in df_procesado.columns:
-            df_para_subir[col_name] = df_procesado[col_name]
-        else:
-            # Si una columna definida en column_order_for_bq no se pudo crear/encontrar
-            # la añadimos con Nones para que el esquema de BQ no falle.
+# --- Carga directa vía GCS (opcional) ---
+# Si se define un bucket, el CSV crudo se sube a GCS y BigQuery lo parsea
+# con su loader distribuido: el proceso local no materializa nada en pandas
+GCS_BUCKET = None  # p.ej. "ia-staging"
+
+# Esquema en el orden de columnas del CSV (las cargas CSV mapean por posición)
+SCHEMA_CSV = [
+    bigquery.SchemaField("Usuario", "INTEGER", mode="NULLABLE"),
+    bigquery.SchemaField("Ejecucion", "DATE", mode="NULLABLE"),
+    bigquery.SchemaField("AREA", "STRING", mode="NULLABLE"),
+    bigquery.SchemaField("PLAN_COMERCIAL", "STRING", mode="NULLABLE"),
+    bigquery.SchemaField("Nombre", "STRING", mode="NULLABLE"),
+    bigquery.SchemaField("kWh_Rec", "FLOAT", mode="NULLABLE"),
+    bigquery.SchemaField("Cluster", "STRING", mode="NULLABLE"),
+    bigquery.SchemaField("puntaje", "INTEGER", mode="NULLABLE"),
+    bigquery.SchemaField("puntaje_1", "FLOAT", mode="NULLABLE"),
+    bigquery.SchemaField("puntaje_2", "FLOAT", mode="NULLABLE"),
+    bigquery.SchemaField("puntaje_3", "FLOAT", mode="NULLABLE"),
+    bigquery.SchemaField("puntaje_4", "FLOAT", mode="NULLABLE"),
+    bigquery.SchemaField("puntaje_5", "FLOAT", mode="NULLABLE"),
+    bigquery.SchemaField("LATI_USU", "FLOAT", mode="NULLABLE"),
+    bigquery.SchemaField("LONG_USU", "FLOAT", mode="NULLABLE"),
+    bigquery.SchemaField("ZONA", "STRING", mode="NULLABLE"),
+]
+
+# Tipos por columna del CSV: el parser C de pandas convierte en una sola
+# pasada sobre los bytes, sin re-tipar columnas object después
+DTYPE_MAP = {
+    "AREA": "string",
+    "cluster_id": "string",
+    "Nombre": "string",
+    "PLAN_COMERCIAL": "string",
+    "ZONA": "string",
+    "puntaje": "Int64",  # Int64 soporta NaNs como pd.NA
+    "Usuario": "Int64",
+    "kWh Rec": "float64",
+    "LATI_USU": "float64",
+    "LONG_USU": "float64",
+    "puntaje_1": "float64",
+    "puntaje_2": "float64",
+    "puntaje_3": "float64",
+    "puntaje_4": "float64",
+    "puntaje_5": "float64",
+}
+
+
+def main():
+    """Sube el CSV de inferencia a BigQuery.
+
+    Todo el costo (cliente de BigQuery, lectura del CSV, jobs de carga) se
+    paga recién al invocar main(), no al importar el módulo.
+    """
+    # --- 1. Autenticación y creación del cliente de BigQuery ---
+    try:
+        credentials = service_account.Credentials.from_service_account_file(
+            ARCHIVO_CREDENCIALES_JSON,
+            scopes=["https://www.googleapis.com/auth/cloud-platform"],
+        )
+        client = bigquery.Client(credentials=credentials, project=PROJECT_ID)
+        print(f"Cliente de BigQuery inicializado para el proyecto '{PROJECT_ID}'.")
+    except Exception as e:
+        print(f"Error de autenticación o al crear el cliente de BigQuery: {e}")
+        return
+
+    if GCS_BUCKET:
+        try:
+            import gzip
+            import shutil
+
+            from google.cloud import storage
+
+            # Comprimir el CSV antes de subirlo: el texto plano comprime 4-8x y
+            # la subida está limitada por ancho de banda; BigQuery detecta el
+            # sufijo .gz y descomprime del lado del servidor
+            archivo_gz = data_interim_dir("dataset_inference.csv.gz")
+            with open(ARCHIVO_CSV, "rb") as f_in, gzip.open(archivo_gz, "wb") as f_out:
+                shutil.copyfileobj(f_in, f_out)
+
+            storage_client = storage.Client(credentials=credentials, project=PROJECT_ID)
+            blob = storage_client.bucket(GCS_BUCKET).blob("dataset_inference.csv.gz")
+            blob.upload_from_filename(archivo_gz)
+            uri = f"gs://{GCS_BUCKET}/dataset_inference.csv.gz"
+            print(f"CSV comprimido subido a '{uri}'.")
+
+            job_config = bigquery.LoadJobConfig(
+                schema=SCHEMA_CSV,
+                source_format=bigquery.SourceFormat.CSV,
+                skip_leading_rows=1,
+                write_disposition=bigquery.WriteDisposition.WRITE_TRUNCATE,
+                allow_quoted_newlines=True,
+                null_marker="",
+            )
+            job = client.load_table_from_uri(uri, TABLE_ID, job_config=job_config)
+            job.result()
+            print(f"¡Datos cargados desde GCS a la tabla '{TABLE_ID}'!")
+        except Exception as e:
+            print(f"Error al cargar datos vía GCS: {e}")
+        return
+
+    # --- 2. Leer los datos del archivo CSV usando Pandas ---
+    try:
+        # Leer solo la cabecera para validar qué columnas esperadas existen
+        columnas_csv = pd.read_csv(ARCHIVO_CSV, encoding="utf-8", nrows=0).columns
+        faltantes = [
+            col for col in list(DTYPE_MAP) + ["Ejecucion"] if col not in columnas_csv
+        ]
+        if faltantes:
             print(
-                f"Info: Columna '{col_name}' no presente en el DataFrame procesado, se añadirá como Nones."
+                f"Advertencia: columnas no encontradas en el CSV, se omitirán: {faltantes}"
+            )
+
+        usecols = [col for col in list(DTYPE_MAP) + ["Ejecucion"] if col in columnas_csv]
+        parse_dates = ["Ejecucion"] if "Ejecucion" in columnas_csv else False
+
+        df = pd.read_csv(
+            ARCHIVO_CSV,
+            encoding="utf-8",
+            engine="c",
+            dtype=DTYPE_MAP,
+            usecols=usecols,
+            parse_dates=parse_dates,
+        )
+        print(
+            f"Datos leídos de '{ARCHIVO_CSV}'. Filas: {len(df)}, Columnas: {len(df.columns)}"
+        )
+
+        if df.empty:
+            print(f"El archivo CSV '{ARCHIVO_CSV}' está vacío. No hay datos para subir.")
+            return
+
+        # --- Renombrar a los nombres de columna de BigQuery ---
+        df_procesado = df.rename(
+            columns={"cluster_id": "Cluster", "kWh Rec": "kWh_Rec"}, copy=False
+        )
+
+        # BigQuery espera objetos date para el tipo DATE. Si alguna celda no
+        # parseó como fecha, parse_dates deja la columna como object: la
+        # pasada con errors="coerce" (no-op si ya es datetime64) degrada esas
+        # celdas a NaT en lugar de abortar la carga completa
+        if "Ejecucion" in df_procesado.columns:
+            df_procesado["Ejecucion"] = pd.to_datetime(
+                df_procesado["Ejecucion"], errors="coerce"
+            ).dt.date
+
+        # Asegurarnos de que todas las columnas que BigQuery espera estén en el DataFrame
+        # y en el orden correcto para el esquema definido (aunque BQ carga por nombre).
+        # Este es el orden de tu imagen, que usaremos para el schema.
+        column_order_for_bq = [
+            "AREA",
+            "Cluster",
+            "Ejecucion",
+            "kWh_Rec",
+            "LATI_USU",
+            "LONG_USU",
+            "Nombre",
+            "PLAN_COMERCIAL",
+            "puntaje",
+            "puntaje_1",
+            "puntaje_2",
+            "puntaje_3",
+            "puntaje_4",
+            "puntaje_5",
+            "Usuario",
+            "ZONA",
+        ]
+
+        # Reordenar y seleccionar las columnas necesarias; las faltantes se
+        # añaden como Nones para que el esquema de BQ no falle
+        df_para_subir = df_procesado.reindex(columns=column_order_for_bq)
+
+    except FileNotFoundError:
+        print(f"Error: El archivo CSV '{ARCHIVO_CSV}' no fue encontrado.")
+        return
+    except pd.errors.EmptyDataError:
+        print(f"Error: El archivo CSV '{ARCHIVO_CSV}' está vacío.")
+        return
+    except Exception as e:
+        print(f"Error procesando los datos con Pandas: {e}")
+        import traceback
+
+        traceback.print_exc()
+        return
+
+    # --- 3. Definir el esquema de BigQuery y ejecutar el job de carga ---
+    try:
+        # Definir el esquema explícitamente basado en tu imagen y el preprocesamiento
+        schema = [
+            bigquery.SchemaField("AREA", "STRING", mode="NULLABLE"),
+            # bigquery.SchemaField("Cluster", "STRING", mode="NULLABLE"), # Si el CSV tuviera Cluster directamente
+            bigquery.SchemaField("Cluster", "STRING", mode="NULLABLE"),
+            bigquery.SchemaField("Ejecucion", "DATE", mode="NULLABLE"),
+            bigquery.SchemaField(
+                "kWh_Rec", "FLOAT", mode="NULLABLE"
+            ),  # O NUMERIC si prefieres
+            bigquery.SchemaField("LATI_USU", "FLOAT", mode="NULLABLE"),
+            bigquery.SchemaField("LONG_USU", "FLOAT", mode="NULLABLE"),
+            bigquery.SchemaField("Nombre", "STRING", mode="NULLABLE"),
+            bigquery.SchemaField("PLAN_COMERCIAL", "STRING", mode="NULLABLE"),
+            bigquery.SchemaField("puntaje", "INTEGER", mode="NULLABLE"),
+            bigquery.SchemaField("puntaje_1", "FLOAT", mode="NULLABLE"),
+            bigquery.SchemaField("puntaje_2", "FLOAT", mode="NULLABLE"),
+            bigquery.SchemaField("puntaje_3", "FLOAT", mode="NULLABLE"),
+            bigquery.SchemaField("puntaje_4", "FLOAT", mode="NULLABLE"),
+            bigquery.SchemaField("puntaje_5", "FLOAT", mode="NULLABLE"),
+            bigquery.SchemaField(
+                "Usuario", "INTEGER", mode="NULLABLE"
+            ),  # O INTEGER si estás seguro que no hay decimales
+            bigquery.SchemaField("ZONA", "STRING", mode="NULLABLE"),
+        ]
+
+        print(
+            f"Subiendo {len(df_para_subir)} filas a la tabla '{TABLE_ID}' en BigQuery..."
+        )
+        # Escribir Parquets de staging y subirlos como jobs de carga: evita la
+        # serialización pandas->JSON de load_table_from_dataframe y deja la
+        # coerción final de tipos al backend de BigQuery. Subir en lotes acota
+        # el pico de memoria de la serialización y permite reintentar un lote
+        # ante una falla transitoria sin repetir toda la carga.
+        TAMANO_LOTE = 100_000
+
+        def _subir_lote(i, chunk):
+            job_config = bigquery.LoadJobConfig(
+                schema=schema,
+                # El primer lote trunca la tabla; los siguientes anexan
+                write_disposition=(
+                    bigquery.WriteDisposition.WRITE_TRUNCATE
+                    if i == 0
+                    else bigquery.WriteDisposition.WRITE_APPEND
+                ),
+                source_format=bigquery.SourceFormat.PARQUET,
             )
-            df_para_subir[col_name] = None
-
-
-except FileNotFoundError:
-    print(f"Error: El archivo CSV '{ARCHIVO_CSV}' no fue encontrado.")
-    exit()
-except pd.errors.EmptyDataError:
-    print(f"Error: El archivo CSV '{ARCHIVO_CSV}' está vacío.")
-    exit()
-except Exception as e:
-    print(f"Error procesando los datos con Pandas: {e}")
-    import traceback
-
-    traceback.print_exc()
-    exit()
-
-# --- 3. Definir el esquema de BigQuery y ejecutar el job de carga ---
-try:
-    # Definir el esquema explícitamente basado en tu imagen y el preprocesamiento
-    schema = [
-        bigquery.SchemaField("AREA", "STRING", mode="NULLABLE"),
-        # bigquery.SchemaField("Cluster", "STRING", mode="NULLABLE"), # Si el CSV tuviera Cluster directamente
-        bigquery.SchemaField("Cluster", "STRING", mode="NULLABLE"),
-        bigquery.SchemaField("Ejecucion", "DATE", mode="NULLABLE"),
-        bigquery.SchemaField(
-            "kWh_Rec", "FLOAT", mode="NULLABLE"
-        ),  # O NUMERIC si prefieres
-        bigquery.SchemaField("LATI_USU", "FLOAT", mode="NULLABLE"),
-        bigquery.SchemaField("LONG_USU", "FLOAT", mode="NULLABLE"),
-        bigquery.SchemaField("Nombre", "STRING", mode="NULLABLE"),
-        bigquery.SchemaField("PLAN_COMERCIAL", "STRING", mode="NULLABLE"),
-        bigquery.SchemaField("puntaje", "INTEGER", mode="NULLABLE"),
-        bigquery.SchemaField("puntaje_1", "FLOAT", mode="NULLABLE"),
-        bigquery.SchemaField("puntaje_2", "FLOAT", mode="NULLABLE"),
-        bigquery.SchemaField("puntaje_3", "FLOAT", mode="NULLABLE"),
-        bigquery.SchemaField("puntaje_4", "FLOAT", mode="NULLABLE"),
-        bigquery.SchemaField("puntaje_5", "FLOAT", mode="NULLABLE"),
-        bigquery.SchemaField(
-            "Usuario", "INTEGER", mode="NULLABLE"
-        ),  # O INTEGER si estás seguro que no hay decimales
-        bigquery.SchemaField("ZONA", "STRING", mode="NULLABLE"),
-    ]
-
-    job_config = bigquery.LoadJobConfig(
-        schema=schema,
-        write_disposition=bigquery.WriteDisposition.WRITE_TRUNCATE,
-        # autodetect=False, # Ya no es necesario porque proveemos el schema
-        # source_format no es necesario para load_table_from_dataframe si los tipos están bien en el DF
-    )
-
-    print(f"Subiendo {len(df_para_subir)} filas a la tabla '{TABLE_ID}' en BigQuery...")
-    # Asegurarse que df_para_subir tiene las columnas en el mismo orden que el schema
-    # aunque BigQuery carga por nombre de columna.
-    job = client.load_table_from_dataframe(
-        df_para_subir[column_order_for_bq],  # Selecciona y ordena las columnas
-        TABLE_ID,
-        job_config=job_config,
-    )
-    job.result()  # Esperar a que el job de carga se complete
-
-    table = client.get_table(TABLE_ID)
-    print(
-        f"¡Datos subidos exitosamente! Se cargaron {table.num_rows} filas a la tabla '{TABLE_ID}'."
-    )
-    print(
-        f"Puedes ver la tabla aquí: https://console.cloud.google.com/bigquery?project={PROJECT_ID}&p={PROJECT_ID}&d={DATASET_ID}&t={TABLE_NAME}&page=table"
-    )
-
-except Exception as e:
-    print(f"Error al subir datos a BigQuery: {e}")
-    if hasattr(e, "errors") and e.errors:
-        print("Detalles del error:")
-        for error_detail in e.errors:
-            print(error_detail)
-    import traceback
-
-    traceback.print_exc()
+            # El Parquet de staging es transitorio: una vez subido el lote,
+            # se elimina para no acumular archivos en data/interim
+            staging = data_interim_dir(f"staging_bq_{i}.parquet")
+            try:
+                chunk.to_parquet(staging, engine="pyarrow", compression="snappy")
+                with open(staging, "rb") as staging_file:
+                    return client.load_table_from_file(
+                        staging_file,
+                        TABLE_ID,
+                        job_config=job_config,
+                    )
+            finally:
+                staging.unlink(missing_ok=True)
+
+        lotes = [
+            (i, df_para_subir.iloc[inicio : inicio + TAMANO_LOTE])
+            for i, inicio in enumerate(range(0, len(df_para_subir), TAMANO_LOTE))
+        ]
+
+        # El TRUNCATE debe completarse antes de despachar los APPEND
+        primer_job = _subir_lote(*lotes[0])
+        primer_job.result()
+        filas_cargadas = primer_job.output_rows or 0
+
+        # Serialización y subida de los lotes restantes en paralelo: el POST
+        # HTTP libera el GIL, así que la escritura Parquet del lote N se
+        # solapa con la subida del lote N-1
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = [
+                executor.submit(_subir_lote, i, chunk) for i, chunk in lotes[1:]
+            ]
+            for future in futures:
+                job = future.result()
+                job.result()
+                filas_cargadas += job.output_rows or 0
+
+        # Los jobs de carga ya reportan las filas escritas: no hace falta el
+        # GET extra de client.get_table solo para imprimir el conteo
+        print(
+            f"¡Datos subidos exitosamente! Se cargaron {filas_cargadas} filas a la tabla '{TABLE_ID}'."
+        )
+        print(
+            f"Puedes ver la tabla aquí: https://console.cloud.google.com/bigquery?project={PROJECT_ID}&p={PROJECT_ID}&d={DATASET_ID}&t={TABLE_NAME}&page=table"
+        )
+
+    except Exception as e:
+        print(f"Error al subir datos a BigQuery: {e}")
+        if hasattr(e, "errors") and e.errors:
+            print("Detalles del error:")
+            for error_detail in e.errors:
+                print(error_detail)
+        import traceback
+
+        traceback.print_exc()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+import gc
+from concurrent.futures import ThreadPoolExecutor
+
+import gspread
+import numpy as np
+import pandas as pd
+from google.oauth2.service_account import Credentials  # Para cargar credenciales explícitamente
+
+from cedenar_anomalies.utils.paths import (
+    data_interim_dir,
+    data_raw_dir,
+)
+
+
+def cargar_valores(path):
+    """Lee un archivo CSV o Parquet y lo convierte en lista de listas para Sheets.
+
+    Sheets ingiere strings de todos modos: convertir cada columna a str de
+    forma vectorizada y apilar con numpy evita boxear cada celda una a una.
+    """
+    if str(path).endswith(".parquet"):
+        df = pd.read_parquet(path)
+        df = df.astype(object).where(df.notna(), "")
+    else:
+        df = pd.read_csv(path, encoding="utf-8", dtype=str).fillna("")
+    arr = np.column_stack([df[col].astype(str).to_numpy() for col in df.columns])
+    valores = [df.columns.tolist()] + arr.tolist()
+    # Liberar el DataFrame y el arreglo intermedio de inmediato: sin esto el
+    # pico de RSS suma el frame, el arreglo y la lista al mismo tiempo
+    del df, arr
+    gc.collect()
+    return valores
+
+# --- Configuración ---
+ARCHIVO_CSV = data_interim_dir("dataset_inference.csv")
+ARCHIVO_ERRORES = data_interim_dir("errores_inference.parquet")
+ARCHIVO_CREDENCIALES_JSON = data_raw_dir("proyecto-ia.json")
+
+# --- Configuración de Google Sheets ---
+NOMBRE_SPREADSHEET = "Datos_Inference"
+NOMBRE_PESTANA_DEV = "inference"
+NOMBRE_PESTANA_ERRORES = "errores"
+
+SCOPES = [
+    "https://www.googleapis.com/auth/spreadsheets",
+    "https://www.googleapis.com/auth/drive",
+]
+
+
+def main():
+    """Sube el CSV de inferencia y las filas con errores a Google Sheets.
+
+    Todo el costo (credenciales, lecturas, llamadas a la API) se paga
+    recién al invocar main(), no al importar el módulo.
+    """
+    # --- 1. Autenticación y apertura del spreadsheet ---
+    try:
+        credentials = Credentials.from_service_account_file(
+            ARCHIVO_CREDENCIALES_JSON,
+            scopes=SCOPES,
+        )
+        gclient = gspread.authorize(credentials)
+        sh = gclient.open(NOMBRE_SPREADSHEET)
+        print(f"Spreadsheet '{NOMBRE_SPREADSHEET}' abierto correctamente.")
+    except Exception as e:
+        print(f"Error de autenticación o al abrir el spreadsheet: {e}")
+        return
+
+    # --- 2. Leer los datos a subir ---
+    try:
+        # Los dos archivos son independientes y su lectura está limitada por
+        # I/O + parseo nativo, así que se cargan en paralelo
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            future_datos = executor.submit(cargar_valores, ARCHIVO_CSV)
+            future_errores = executor.submit(cargar_valores, ARCHIVO_ERRORES)
+
+        datos_completos_para_subir = future_datos.result()
+        datos_completos_para_subir_errores = future_errores.result()
+        print(
+            f"Datos leídos de '{ARCHIVO_CSV}'. "
+            f"Filas: {len(datos_completos_para_subir) - 1}"
+        )
+        print(
+            f"Datos leídos de '{ARCHIVO_ERRORES}'. "
+            f"Filas: {len(datos_completos_para_subir_errores) - 1}"
+        )
+    except FileNotFoundError as e:
+        print(f"Error: archivo no encontrado: {e}")
+        return
+    except Exception as e:
+        print(f"Error procesando los datos con Pandas: {e}")
+        return
+
+    # --- 3. Subir los datos a Google Sheets ---
+    try:
+        # Una sola llamada para limpiar ambas pestañas y una sola para escribirlas:
+        # dos round-trips HTTP en total en lugar de uno por operación y pestaña
+        sh.batch_clear([NOMBRE_PESTANA_DEV, NOMBRE_PESTANA_ERRORES])
+        sh.values_batch_update(
+            {
+                "valueInputOption": "RAW",
+                "data": [
+                    {
+                        "range": f"'{NOMBRE_PESTANA_DEV}'!A1",
+                        "values": datos_completos_para_subir,
+                    },
+                    {
+                        "range": f"'{NOMBRE_PESTANA_ERRORES}'!A1",
+                        "values": datos_completos_para_subir_errores,
+                    },
+                ],
+            }
+        )
+        print(
+            f"¡Datos subidos exitosamente! {len(datos_completos_para_subir) - 1} filas a "
+            f"'{NOMBRE_PESTANA_DEV}' y {len(datos_completos_para_subir_errores) - 1} filas "
+            f"a '{NOMBRE_PESTANA_ERRORES}'."
+        )
+    except Exception as e:
+        print(f"Error al subir datos a Google Sheets: {e}")
+
+
+if __name__ == "__main__":
+    main()
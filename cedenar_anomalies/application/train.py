@@ -1,7 +1,9 @@
 # cedenar_anomalies/application/train.py
 
+import argparse
 import logging
 from pathlib import Path
+from types import MappingProxyType
 
 import pandas as pd
 
@@ -9,24 +11,68 @@ from cedenar_anomalies.domain.services.clustering_pipeline_service import (
     PipelineClusterFzz,
     PipelinePuntaje,
 )
-from cedenar_anomalies.utils.paths import data_interim_dir
+from cedenar_anomalies.utils.io import as_categorical, enable_copy_on_write
+from cedenar_anomalies.utils.logging_config import setup_logging
+from cedenar_anomalies.utils.paths import data_interim_dir, data_processed_dir
 
-# Configurar logging
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
-)
 logger = logging.getLogger(__name__)
 
+# Hiperparámetros de LightGBM ajustados con Optuna, con los valores exactos
+# que arrojó la búsqueda (LightGBM los consume como double, así que redondear
+# sí cambiaría el modelo entrenado). El proxy de solo lectura evita
+# mutaciones accidentales entre corridas.
+EXPECTED_PARAM_KEYS = frozenset(
+    {
+        "n_estimators",
+        "learning_rate",
+        "num_leaves",
+        "max_depth",
+        "min_child_samples",
+        "max_bin",
+        "reg_alpha",
+        "reg_lambda",
+        "min_gain_to_split",
+        "bagging_fraction",
+        "bagging_freq",
+        "feature_fraction",
+    }
+)
+BEST_PARAMS = MappingProxyType(
+    {
+        "n_estimators": 468,
+        "learning_rate": 0.027112035074244662,
+        "num_leaves": 116,
+        "max_depth": 12,
+        "min_child_samples": 22,
+        "max_bin": 225,
+        "reg_alpha": 0.003891437220124611,
+        "reg_lambda": 0.8161960202355869,
+        "min_gain_to_split": 7.269371017270656,
+        "bagging_fraction": 0.9243380690332376,
+        "bagging_freq": 3,
+        "feature_fraction": 0.9616425348024227,
+    }
+)
+if set(BEST_PARAMS) != EXPECTED_PARAM_KEYS:
+    raise ValueError("BEST_PARAMS tiene claves inesperadas")
+for _param, _value in BEST_PARAMS.items():
+    if not isinstance(_value, (int, float)) or isinstance(_value, bool):
+        raise TypeError(f"BEST_PARAMS[{_param!r}] debe ser numérico, no {type(_value).__name__}")
 
-def main():
+
+def main(data_dir="interim", data_filename="01_dataset_train_clean.parquet"):
     """
     Función principal para entrenar modelos de clustering por zona usando arquitectura hexagonal.
+
+    Args:
+        data_dir: Directorio de datos a usar ("interim" o "processed")
+        data_filename: Nombre del archivo de entrenamiento dentro de ese directorio
     """
     logger.info("Iniciando entrenamiento de modelos de clustering...")
 
     # Configuración
-    data_filename = "01_dataset_train_clean.csv"
-    data_path = data_interim_dir(data_filename)
+    dir_resolver = {"interim": data_interim_dir, "processed": data_processed_dir}
+    data_path = dir_resolver[data_dir](data_filename)
 
     if not Path(data_path).exists():
         logger.error(f"Archivo de entrenamiento no encontrado: {data_path}")
@@ -34,7 +80,7 @@ def main():
 
     # Cargar datos
     try:
-        df = pd.read_csv(data_path)
+        df = as_categorical(pd.read_parquet(data_path))
         logger.info(f"Datos cargados correctamente. Shape: {df.shape}")
     except Exception as e:
         logger.exception(f"Error al cargar el archivo: {e}")
@@ -42,7 +88,7 @@ def main():
 
     try:
         # Entrenar modelos cluster por zona
-        pipe = PipelineClusterFzz(logger=logger)
+        pipe = PipelineClusterFzz(logger=logger, n_jobs=-1)
         pipelines = pipe.train_by_zone(df)
 
         if not pipelines:
@@ -50,22 +96,7 @@ def main():
             return
 
         # Entrenar modelos puntaje
-        best_params = {
-            "n_estimators": 468,
-            "learning_rate": 0.027112035074244662,
-            "num_leaves": 116,
-            "max_depth": 12,
-            "min_child_samples": 22,
-            "max_bin": 225,
-            "reg_alpha": 0.003891437220124611,
-            "reg_lambda": 0.8161960202355869,
-            "min_gain_to_split": 7.269371017270656,
-            "bagging_fraction": 0.9243380690332376,
-            "bagging_freq": 3,
-            "feature_fraction": 0.9616425348024227,
-        }
-
-        pipe_puntaje = PipelinePuntaje(params=best_params, logger=logger)
+        pipe_puntaje = PipelinePuntaje(params=BEST_PARAMS, logger=logger)
         pipeline_puntaje = pipe_puntaje.fit(df)
 
         if not pipeline_puntaje:
@@ -78,4 +109,21 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    setup_logging()
+    enable_copy_on_write()
+    parser = argparse.ArgumentParser(
+        description="Entrena los modelos de cluster por zona y de puntaje."
+    )
+    parser.add_argument(
+        "--data-dir",
+        choices=["interim", "processed"],
+        default="interim",
+        help="Directorio de datos del que leer el dataset de entrenamiento",
+    )
+    parser.add_argument(
+        "--data-filename",
+        default="01_dataset_train_clean.parquet",
+        help="Nombre del archivo de entrenamiento",
+    )
+    args = parser.parse_args()
+    main(data_dir=args.data_dir, data_filename=args.data_filename)
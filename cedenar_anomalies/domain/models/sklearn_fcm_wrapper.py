@@ -3,10 +3,21 @@
 import logging
 from typing import Optional
 
+import numpy as np
 from fcmeans import FCM
 from sklearn.base import BaseEstimator, ClusterMixin
 
 
+def _as_float32(X):
+    """Compacta la matriz de entrada a float32 contiguo.
+
+    El StandardScaler emite float64 y los bucles de distancia del FCM son
+    limitados por ancho de banda de memoria: la mitad de bytes por elemento
+    rinde casi el doble sin pérdida apreciable para estas características.
+    """
+    return np.ascontiguousarray(X, dtype=np.float32)
+
+
 class SklearnFCMWrapper(BaseEstimator, ClusterMixin):
     def __init__(
         self,
@@ -24,6 +35,7 @@ class SklearnFCMWrapper(BaseEstimator, ClusterMixin):
 
     def fit(self, X, y=None):
         self.logger.info(f"Entrenando FCM con {self.n_clusters} clusters y m={self.m}")
+        X = _as_float32(X)
         self.model_ = FCM(
             n_clusters=self.n_clusters,
             m=self.m,
@@ -41,11 +53,11 @@ class SklearnFCMWrapper(BaseEstimator, ClusterMixin):
 
     def predict(self, X):
         self.logger.info("Realizando predicción con FCM.")
-        return self.model_.predict(X)
+        return self.model_.predict(_as_float32(X))
 
     def soft_predict(self, X):
         self.logger.info("Realizando predicción con FCM.")
-        return self.model_.soft_predict(X)
+        return self.model_.soft_predict(_as_float32(X))
 
 
 if __name__ == "__main__":
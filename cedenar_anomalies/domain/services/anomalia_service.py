@@ -1,6 +1,6 @@
 # cedenar_anomalies/domain/services/anomalia_service.py
 import logging
-import uuid
+import os
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
@@ -9,6 +9,42 @@ import pandas as pd
 from cedenar_anomalies.domain.ports.repositories import IAnomaliaRepository, IApiClient
 from cedenar_anomalies.infrastructure.database.models import AnomaliaData
 
+# Esquema del CSV limpio, construido una sola vez a nivel de módulo. Las
+# columnas de texto de baja cardinalidad se leen como category: read_csv
+# materializa códigos enteros directamente en lugar de un str de Python
+# por celda ('Descripcion' es texto libre y queda str)
+_DTYPE_MAP = {
+    "AREA": "category",
+    "item_288": "Int64",
+    "odt": "Int64",
+    "orden": "Int64",
+    "PLAN_COMERCIAL": "category",
+    "Descripcion": str,
+    "reincidente": "category",
+    "Anomalia_conf": "category",
+    "ZONA": "category",
+    "año": "Int64",
+    "LATI_USU": float,
+    "LONG_USU": float,
+    "NIVEL": float,
+    "item_68": bool,
+    "item_74": bool,
+    "item_237": bool,
+    "item_248": "category",
+    "item_597": "category",
+    "item_602": "category",
+    "item_108": "category",
+    "item_43": "category",
+    "item_603": "category",
+    "item_599": "category",
+    "item_35": "category",
+    "item_598": "category",
+    "item_33": "category",
+    "item_601": "category",
+    "item_24": "category",
+    "item_23": "category",
+}
+
 
 class AnomaliaService:
     """Servicio de dominio para operaciones con anomalías"""
@@ -34,49 +70,45 @@ class AnomaliaService:
         Returns:
             int: Número de registros guardados
         """
-        dtype_map = {
-        "AREA": str,
-        "item_288": "Int64",
-        "odt": "Int64",
-        "orden": "Int64",
-        "PLAN_COMERCIAL": str,
-        "Descripcion": str,
-        "reincidente": str,
-        "Anomalia_conf": str,
-        "ZONA": str,
-        "año": "Int64",
-        "LATI_USU": float,
-        "LONG_USU": float,
-        "NIVEL": float,
-        "item_68": bool,
-        "item_74": bool,
-        "item_237": bool,
-        "item_248": str,
-        "item_597": str,
-        "item_602": str,
-        "item_108": str,
-        "item_43": str,
-        "item_603": str,
-        "item_599": str,
-        "item_35": str,
-        "item_598": str,
-        "item_33": str,
-        "item_601": str,
-        "item_24": str,
-        "item_23": str,
-        }
         self.logger.info(f"Cargando datos desde {csv_path} para el año {year}")
 
-        # Leer CSV
-        df = pd.read_csv(csv_path, dtype=dtype_map, low_memory=False)
+        # Leer el archivo (Parquet preserva los dtypes; CSV requiere el mapeo)
+        if str(csv_path).endswith(".parquet"):
+            df = pd.read_parquet(csv_path)
+        else:
+            # Proyectar sólo las columnas que consume el repositorio: la
+            # cabecera se intersecta con el mapeo para tolerar archivos sin
+            # 'año'. El motor pyarrow parsea el CSV en paralelo; si no está
+            # disponible se cae al motor C con el archivo mapeado en memoria
+            header = pd.read_csv(csv_path, nrows=0).columns
+            usecols = [col for col in header if col in _DTYPE_MAP]
+            try:
+                df = pd.read_csv(
+                    csv_path,
+                    dtype={col: _DTYPE_MAP[col] for col in usecols},
+                    usecols=usecols,
+                    engine="pyarrow",
+                )
+            except (ImportError, ValueError) as e:
+                self.logger.debug(f"Motor pyarrow no disponible ({e}); usando motor C.")
+                df = pd.read_csv(
+                    csv_path,
+                    dtype=_DTYPE_MAP,
+                    usecols=usecols,
+                    low_memory=False,
+                    memory_map=True,
+                )
 
         # Asegurarse de que exista la columna 'ano'
         if "año" not in df.columns:
             self.logger.info(f"Añadiendo columna 'año' con valor {year}")
             df["año"] = year
 
-        # Agregar columna id y fecha creacion
-        df["id"] = [uuid.uuid4().hex for _ in range(len(df))]
+        # Agregar columna id y fecha creacion. Los ids de 128 bits se
+        # generan en bloque: una sola llamada a urandom y una sola
+        # codificación hex, en lugar de un objeto uuid por fila
+        hex_blob = os.urandom(16 * len(df)).hex()
+        df["id"] = [hex_blob[i : i + 32] for i in range(0, 32 * len(df), 32)]
         df["fecha_creacion"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
         # Guardar datos
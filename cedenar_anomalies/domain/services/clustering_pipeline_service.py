@@ -4,7 +4,9 @@ import logging
 from typing import Optional
 
 import joblib
+import numpy as np
 import pandas as pd
+from joblib import Parallel, delayed
 from lightgbm import LGBMClassifier
 from sklearn.compose import ColumnTransformer
 from sklearn.impute import SimpleImputer
@@ -19,7 +21,6 @@ from sklearn.metrics import (
 from sklearn.model_selection import train_test_split
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import (
-    FunctionTransformer,
     LabelEncoder,
     OrdinalEncoder,
     StandardScaler,
@@ -30,12 +31,63 @@ from cedenar_anomalies.domain.models.sklearn_fcm_wrapper import SklearnFCMWrappe
 # Importar utilidades para gestión de rutas
 from cedenar_anomalies.utils.paths import models_dir
 
-# Configurar logging
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
-)
 logger = logging.getLogger(__name__)
-logger.info(SklearnFCMWrapper.__module__)
+
+# Dispositivo detectado para LightGBM (None hasta la primera sonda)
+_LGBM_DEVICE = None
+
+
+def _lgbm_device() -> str:
+    """
+    Detecta una sola vez si la instalación de LightGBM soporta GPU.
+
+    Ajusta un clasificador mínimo sobre datos sintéticos con
+    ``device="gpu"``; si el build no trae soporte CUDA/OpenCL la sonda
+    falla y se usa CPU. El resultado se cachea a nivel de módulo.
+    """
+    global _LGBM_DEVICE
+    if _LGBM_DEVICE is None:
+        try:
+            rng = np.random.default_rng(0)
+            probe = LGBMClassifier(
+                device="gpu", n_estimators=1, min_child_samples=1, verbose=-1
+            )
+            probe.fit(rng.random((100, 2)), rng.integers(0, 2, size=100))
+            _LGBM_DEVICE = "gpu"
+        except Exception:
+            _LGBM_DEVICE = "cpu"
+        logger.info(f"LightGBM entrenará en dispositivo: {_LGBM_DEVICE}")
+    return _LGBM_DEVICE
+
+
+class _LazyPipelines(dict):
+    """Diccionario de pipelines por zona con carga diferida.
+
+    Cada modelo se deserializa recién en el primer acceso, con
+    mmap_mode="r" para que los arreglos de parámetros se mapeen desde
+    disco en lugar de copiarse a RAM. Las zonas sin acceso nunca se
+    cargan, lo que domina cuando el DataFrame solo cubre algunas zonas.
+    """
+
+    def __init__(self, paths: dict, logger: logging.Logger):
+        super().__init__()
+        self._paths = dict(paths)
+        self._logger = logger
+
+    def __missing__(self, zona):
+        pipeline = joblib.load(self._paths[zona], mmap_mode="r")
+        self[zona] = pipeline
+        self._logger.info(f"Pipeline cargado para zona: {zona}")
+        return pipeline
+
+    def __iter__(self):
+        return iter(self._paths)
+
+    def __len__(self):
+        return len(self._paths)
+
+    def __contains__(self, zona):
+        return zona in self._paths
 
 
 class PipelineClusterFzz:
@@ -46,17 +98,23 @@ class PipelineClusterFzz:
         distance="euclidean",
         model_dir=models_dir(),
         scores_path="silhouette_scores.csv",
+        n_jobs=1,
+        silhouette_sample_size=10_000,
         logger: Optional[logging.Logger] = None,
     ):
         self.n_clusters = n_clusters
         self.model_dir = model_dir
         self.distance = distance
         self.m = m
+        self.n_jobs = n_jobs
+        self.silhouette_sample_size = silhouette_sample_size
         self.scores_path = models_dir(f"{distance}_{scores_path}")
         self.model_dir.mkdir(parents=True, exist_ok=True)
         self.scores = []
         self.numerical_cols = ["LATI_USU","LONG_USU"]
         self.categorical_cols = ["TRAFO_OPEN","AREA","PLAN_COMERCIAL","SUB_CATEGORIA"]
+        self._pipelines_cache = None
+        self._pipelines_signature = None
         self.logger = logging.getLogger(self.__class__.__name__)
         self.logger.info("Inicializando PipelineClusterFzz")
 
@@ -104,15 +162,22 @@ class PipelineClusterFzz:
         return pipeline
 
     def fit(self, df: pd.DataFrame, zona: str) -> Pipeline:
+        return self._fit_frame(df[df["ZONA"] == zona], zona)
+
+    def _fit_frame(self, df_zone: pd.DataFrame, zona: str) -> Pipeline:
+        """Ajusta el pipeline sobre una rebanada ya filtrada por zona."""
         self.logger.info(f"Iniciando entrenamiento para zona: {zona}")
-        df_zone = df[df["ZONA"] == zona].copy()
-        df_zone = df_zone.drop_duplicates(subset= self.numerical_cols + self.categorical_cols).copy()
+        df_zone = df_zone.drop_duplicates(
+            subset=self.numerical_cols + self.categorical_cols
+        )
         pipeline = self.build_pipeline()
         pipeline.fit(df_zone)
         self.logger.info(f"Entrenamiento completado para zona: {zona}")
         return pipeline
 
-    def predict(self, pipeline: Pipeline, df: pd.DataFrame) -> pd.DataFrame:
+    def predict(
+        self, pipeline: Pipeline, df: pd.DataFrame, return_transformed: bool = False
+    ) -> pd.DataFrame:
         self.logger.info("Iniciando predicción con pipeline entrenado.")
         df = df.copy()
 
@@ -128,42 +193,63 @@ class PipelineClusterFzz:
         # Obtener cluster suave
         matrix_pertenencia = pipeline.named_steps["cluster"].soft_predict(X_transformed)
         cluster_columns = [f"cluster_{i}" for i in range(matrix_pertenencia.shape[1])]
-        matrix_pertenencia_df = pd.DataFrame(matrix_pertenencia, columns=cluster_columns)
 
-        # Unir con el dataframe original
-        df = pd.concat(
-            [df.reset_index(drop=True), matrix_pertenencia_df.reset_index(drop=True)],
-            axis=1,
-        )
+        # Asignar la matriz de pertenencia directamente: concat reconstruía
+        # el block manager copiando todas las columnas existentes
+        df = df.reset_index(drop=True)
+        df[cluster_columns] = matrix_pertenencia
+        if return_transformed:
+            return df, X_transformed
         return df
 
-    def train_by_zone(self, df: pd.DataFrame) -> dict:
-        pipelines = {}
-        silhouette_scores = []
+    def _train_zone(self, df_zone: pd.DataFrame, zona: str) -> tuple:
+        self.logger.info(f"Procesando zona: {zona}")
+        # La rebanada llega ya filtrada por zona desde train_by_zone: ni el
+        # ajuste ni la predicción vuelven a escanear el frame completo
+        pipeline = self._fit_frame(df_zone, zona)
+        # predict devuelve la matriz ya transformada: la silueta la reutiliza
+        # en lugar de volver a pasar las mismas filas por el preprocesador
+        df_with_clusters, X_transformed = self.predict(
+            pipeline, df_zone, return_transformed=True
+        )
+        # La silueta completa es O(n²) en filas; muestrear acota el cálculo
+        # sin mover el índice de forma apreciable
+        score = silhouette_score(
+            X_transformed,
+            df_with_clusters["cluster_id"],
+            sample_size=min(self.silhouette_sample_size, len(X_transformed)),
+            random_state=42,
+        )
+        self.logger.info(f"Índice de silueta para zona {zona}: {score:.4f}")
 
-        self.logger.info("Entrenando pipelines por zona.")
-        for zona in df["ZONA"].unique():
-            self.logger.info(f"Procesando zona: {zona}")
-            df_zone = df[df["ZONA"] == zona].copy()
-            pipeline = self.fit(df, zona)
-            df_with_clusters = self.predict(pipeline, df_zone)
-
-            X_transformed = pipeline.named_steps["preprocess"].transform(
-                df_zone[self.categorical_cols + self.numerical_cols]
-            )
-            score = silhouette_score(X_transformed, df_with_clusters["cluster_id"])
-            self.logger.info(f"Índice de silueta para zona {zona}: {score:.4f}")
+        pc = pipeline.named_steps["cluster"].pc_
+        pec = pipeline.named_steps["cluster"].pec_
 
-            pc = pipeline.named_steps["cluster"].pc_
-            pec = pipeline.named_steps["cluster"].pec_
+        joblib.dump(pipeline, self.model_dir / f"pipeline_{zona}.pkl")
+        self.logger.info(f"Pipeline guardado para zona {zona}")
 
-            joblib.dump(pipeline, self.model_dir / f"pipeline_{zona}.pkl")
-            self.logger.info(f"Pipeline guardado para zona {zona}")
+        return zona, pipeline, {
+            "zona": zona,
+            "silhouette_score": score,
+            "PC": pc,
+            "PEC": pec,
+        }
 
-            silhouette_scores.append(
-                {"zona": zona, "silhouette_score": score, "PC": pc, "PEC": pec}
-            )
-            pipelines[zona] = pipeline
+    def train_by_zone(self, df: pd.DataFrame) -> dict:
+        self.logger.info("Entrenando pipelines por zona.")
+
+        # Los ajustes por zona son independientes: se reparten entre procesos
+        # con el backend loky, que evita sobre-suscribir los hilos internos
+        # de sklearn/FCM. Con n_jobs=1 el comportamiento es el secuencial.
+        # Cada worker recibe sólo la rebanada de su zona: loky picklea esa
+        # partición en lugar del frame completo por tarea.
+        resultados = Parallel(n_jobs=self.n_jobs, backend="loky")(
+            delayed(self._train_zone)(df_zone, zona)
+            for zona, df_zone in df.groupby("ZONA", sort=False, observed=True)
+        )
+
+        pipelines = {zona: pipeline for zona, pipeline, _ in resultados}
+        silhouette_scores = [entry for _, _, entry in resultados]
 
         pd.DataFrame(silhouette_scores).to_csv(self.scores_path, index=False)
         self.logger.info(f"Scores de silueta guardados en: {self.scores_path}")
@@ -171,21 +257,46 @@ class PipelineClusterFzz:
 
     def predict_all_zones(self, df: pd.DataFrame, pipelines: dict) -> pd.DataFrame:
         self.logger.info("Iniciando predicción en todas las zonas.")
-        df_all = []
-        for zona, pipeline in pipelines.items():
+
+        # Particionar el DataFrame por zona una sola vez en lugar de un
+        # escaneo booleano completo por cada zona
+        zone_groups = dict(tuple(df.groupby("ZONA", sort=False, observed=True)))
+
+        def _predict_zone(zona, pipeline):
             self.logger.info(f"Prediciendo zona: {zona}")
-            df_zone = df[df["ZONA"] == zona].copy()
-            df_clustered = self.predict(pipeline, df_zone)
-            df_all.append(df_clustered)
+            return self.predict(pipeline, zone_groups[zona])
+
+        zonas_presentes = [zona for zona in pipelines if zona in zone_groups]
+        zonas_sin_datos = [zona for zona in pipelines if zona not in zone_groups]
+        if zonas_sin_datos:
+            self.logger.warning(f"Zonas sin registros en los datos: {zonas_sin_datos}")
+
+        if not zonas_presentes:
+            return pd.DataFrame()
+
+        # Las zonas son independientes; los transformadores y el FCM liberan
+        # el GIL en las rutinas numéricas, así que los hilos escalan bien
+        df_all = Parallel(n_jobs=-1, prefer="threads")(
+            delayed(_predict_zone)(zona, pipelines[zona]) for zona in zonas_presentes
+        )
         return pd.concat(df_all, ignore_index=True)
 
     def load_pipelines(self) -> dict:
-        self.logger.info("Cargando pipelines guardados desde disco.")
-        pipelines = {}
-        for model_file in self.model_dir.glob("pipeline_*.pkl"):
-            zona = model_file.stem.replace("pipeline_", "")
-            pipelines[zona] = joblib.load(model_file)
-            self.logger.info(f"Pipeline cargado para zona: {zona}")
+        # Firma (nombre, mtime) de los modelos en disco: si no cambió desde la
+        # última carga, se reutilizan los pipelines ya deserializados
+        model_files = sorted(self.model_dir.glob("pipeline_*.pkl"))
+        signature = tuple((f.name, f.stat().st_mtime_ns) for f in model_files)
+
+        if self._pipelines_cache is not None and signature == self._pipelines_signature:
+            self.logger.info("Reutilizando pipelines ya cargados (sin cambios en disco).")
+            return self._pipelines_cache
+
+        self.logger.info("Registrando pipelines guardados para carga diferida.")
+        paths = {f.stem.replace("pipeline_", ""): f for f in model_files}
+        pipelines = _LazyPipelines(paths, self.logger)
+
+        self._pipelines_cache = pipelines
+        self._pipelines_signature = signature
         return pipelines
 
 
@@ -207,29 +318,42 @@ class PipelinePuntaje:
         self.logger = logging.getLogger(self.__class__.__name__)
         self.logger.info("Inicializando PipelinePuntaje")
 
-    @staticmethod
-    def do_nothing(X):
-        return X
-
-    @staticmethod
-    def convert_to_categorical(X):
-        X_copy = X.copy()
-        for col in X_copy.columns:
-            X_copy[col] = X_copy[col].astype("category")
-        return X_copy
+    def _with_categories(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Asegura dtype ``category`` en las columnas categóricas, una sola vez.
+
+        LightGBM trata las columnas category de pandas de forma nativa, así
+        que basta convertirlas antes de fit/predict en lugar de pagar un
+        FunctionTransformer que recorría y copiaba las columnas en cada
+        transform.
+        """
+        pending = [
+            col
+            for col in self.categorical_cols
+            if col in df.columns and df[col].dtype != "category"
+        ]
+        if pending:
+            df[pending] = df[pending].astype("category")
+        return df
 
     def build_pipeline(self):
         self.logger.info("Construyendo pipeline de preprocesamiento para puntaje.")
 
-        lgbm_class = LGBMClassifier(verbose=-1, objective="multiclass", **self.params)
-
-        do_nothing_transformer = FunctionTransformer(self.do_nothing)
-        convert_type_transformer = FunctionTransformer(self.convert_to_categorical)
-
+        # device va antes de self.params para que la configuración explícita
+        # pueda forzar CPU/GPU; max_bin bajo acelera los histogramas en GPU
+        lgbm_kwargs = {"device": _lgbm_device()}
+        if lgbm_kwargs["device"] == "gpu":
+            lgbm_kwargs["max_bin"] = 63
+        lgbm_kwargs.update(self.params)
+        lgbm_class = LGBMClassifier(verbose=-1, objective="multiclass", **lgbm_kwargs)
+
+        # Sólo selección de columnas: los dtypes categóricos ya vienen
+        # puestos por _with_categories y passthrough los preserva, con lo
+        # que LightGBM recibe las category de pandas sin transformadores
+        # Python por lote
         preprocessor = ColumnTransformer(
             transformers=[
-                ("numeric", do_nothing_transformer, self.numerical_cols),
-                ("cat", convert_type_transformer, self.categorical_cols),
+                ("features", "passthrough", self.numerical_cols + self.categorical_cols),
             ],
             verbose_feature_names_out=False,
         )
@@ -244,6 +368,7 @@ class PipelinePuntaje:
     def fit(self, df: pd.DataFrame) -> Pipeline:
         self.logger.info("Iniciando entrenamiento para puntaje")
         df = df.dropna(subset=["puntaje"])
+        df = self._with_categories(df)
 
         # Crea la columna combinada para la estratificación
         # Convertir a string para asegurar que la concatenación funcione bien
@@ -335,6 +460,7 @@ class PipelinePuntaje:
     def predict(self, pipeline: Pipeline, df: pd.DataFrame) -> pd.DataFrame:
         self.logger.info("Iniciando predicción con pipeline entrenado.")
         df = df.copy()
+        df = self._with_categories(df)
 
         df['puntaje_pred'] = pipeline.predict(df)
         df['puntaje_pred'] = df.puntaje_pred + 1
@@ -342,13 +468,11 @@ class PipelinePuntaje:
         # Obtener propension a puntaje
         matrix_pertenencia = pipeline.predict_proba(df)
         puntaje_columns = [f"puntaje_{i + 1}" for i in range(matrix_pertenencia.shape[1])]
-        matrix_pertenencia_df = pd.DataFrame(matrix_pertenencia, columns=puntaje_columns)
 
-        # Unir con el dataframe original
-        df = pd.concat(
-            [df.reset_index(drop=True), matrix_pertenencia_df.reset_index(drop=True)],
-            axis=1,
-        )
+        # Asignación directa de la matriz en lugar de un concat que copia
+        # todas las columnas existentes a un block manager nuevo
+        df = df.reset_index(drop=True)
+        df[puntaje_columns] = matrix_pertenencia
         return df
 
     def load_pipeline(self) -> Pipeline:
@@ -17,6 +17,9 @@ class DataCleaningService:
     transformaciones de datos para prepararlo para análisis posterior.
     """
 
+    # Cardinalidad máxima para detallar value_counts en el reporte final
+    MAX_REPORT_CARDINALITY = 10_000
+
     def __init__(
         self,
         df: pd.DataFrame,
@@ -33,6 +36,14 @@ class DataCleaningService:
             columns_to_keep: Lista opcional de columnas a conservar en el resultado final
             logger: Logger opcional para registrar las operaciones
         """
+        # Proyectar antes de copiar: la copia defensiva materializa sólo
+        # las columnas que la limpieza conserva en lugar del frame completo
+        # ('año' se preserva siempre para el filtrado por año posterior)
+        if columns_to_keep:
+            projected = [
+                col for col in df.columns if col in columns_to_keep or col == "año"
+            ]
+            df = df[projected]
         self.df = df.copy()
         self.output_filename = output_filename or "cleaned_data.csv"
         self.original_shape = self.df.shape
@@ -344,6 +355,34 @@ class DataCleaningService:
 
         return self.df
 
+    def _categorize_text_columns(self) -> pd.DataFrame:
+        """
+        Convierte a ``category`` las columnas de texto de baja cardinalidad.
+
+        Al final de la limpieza ya no se asignan valores nuevos a estas
+        columnas (item_*, 'reincidente', 'Anomalia_conf'), así que pueden
+        guardarse como códigos enteros más un diccionario pequeño en lugar
+        de un str de Python por celda. El umbral de cardinalidad deja fuera
+        los textos libres como 'Descripcion'.
+
+        Returns:
+            DataFrame con las columnas de baja cardinalidad como category
+        """
+        n_rows = len(self.df)
+        if n_rows == 0:
+            return self.df
+
+        converted = []
+        for col in self.df.select_dtypes(include=["object"]).columns:
+            if self.df[col].nunique(dropna=True) / n_rows < 0.05:
+                self.df[col] = self.df[col].astype("category")
+                converted.append(col)
+
+        if converted:
+            self.logger.info(f"Columnas convertidas a 'category': {converted}")
+        self.report["categorized_columns"] = converted
+        return self.df
+
     def generate_final_report(self) -> Dict:
         """
         Genera un informe del estado final del DataFrame después de la limpieza.
@@ -353,14 +392,22 @@ class DataCleaningService:
         """
         self.logger.info("Generando reporte final del DataFrame limpio...")
 
+        # Conteo de valores sólo para columnas de cardinalidad acotada: en
+        # texto libre como 'Descripcion' el value_counts ordenaría millones
+        # de cadenas únicas para un reporte que nadie consume entero
+        categorical_summary = {}
+        for col in self.df.select_dtypes(include=["object", "category"]).columns:
+            n_unique = self.df[col].nunique(dropna=True)
+            if n_unique > self.MAX_REPORT_CARDINALITY:
+                categorical_summary[col] = f"Alta cardinalidad ({n_unique} únicos)"
+            else:
+                categorical_summary[col] = self.df[col].value_counts().to_dict()
+
         final_report = {
             "final_shape": self.df.shape,
             "missing_values": self.df.isna().sum().to_dict(),
             "data_types": {col: str(dtype) for col, dtype in self.df.dtypes.items()},
-            "categorical_columns": {
-                col: self.df[col].value_counts().to_dict()
-                for col in self.df.select_dtypes(include=["object", "category"]).columns
-            },
+            "categorical_columns": categorical_summary,
         }
 
         # Cálculo de la reducción
@@ -466,6 +513,9 @@ class DataCleaningService:
         if self.columns_to_keep and len(self.columns_to_keep) < len(self.df.columns):
             self._select_columns()
 
+        # Compactar las columnas de texto de baja cardinalidad
+        self._categorize_text_columns()
+
         # Generar reporte final
         self.generate_final_report()
 
@@ -3,6 +3,7 @@ from datetime import datetime
 from typing import Dict, Optional
 
 import pandas as pd
+from joblib import Parallel, delayed
 
 
 class DataProcessingService:
@@ -17,6 +18,12 @@ class DataProcessingService:
     ZONA_ID = 1
     ODT_NUMBER_ID = 288
 
+    # Clave natural de una fila anomalía-código-usuario tras el explode de
+    # Codigo y los merges: deduplicar sobre ella hashea unas pocas columnas
+    # en lugar de cada celda del frame (PRODUCTO distingue a los usuarios
+    # sin anomalía que aporta el merge por la derecha)
+    DEDUP_KEYS = ["Orden", "Codigo", "Usuario", "PRODUCTO"]
+
     def __init__(
         self, target_year: Optional[int] = None, logger: Optional[logging.Logger] = None
     ):
@@ -43,6 +50,49 @@ class DataProcessingService:
         self.item_ids = []
         self.report = {}
 
+        # Partición de df_plain por id, construida perezosamente
+        self._plain_by_id = None
+
+    def _plain_groups(self) -> Dict:
+        """
+        Calcula una sola vez los índices de fila de ``df_plain`` por ``id``.
+
+        Devuelve un mapeo id -> posiciones de fila (``groupby(...).indices``):
+        cada consulta por id pasa de un escaneo booleano completo del frame a
+        una búsqueda en diccionario más un ``take``, sin materializar todos
+        los grupos por adelantado.
+        """
+        if self._plain_by_id is None:
+            self._plain_by_id = self.df_plain.groupby(
+                "id", observed=True, sort=False
+            ).indices
+        return self._plain_by_id
+
+    def _plain_rows(self, item_id) -> pd.DataFrame:
+        """Filas de ``df_plain`` para un id, vía take sobre índices precalculados."""
+        groups = self._plain_groups()
+        if item_id not in groups:
+            return self.df_plain.iloc[0:0]
+        return self.df_plain.take(groups[item_id])
+
+    @staticmethod
+    def _as_key(frame: pd.DataFrame, column: str) -> pd.DataFrame:
+        """
+        Normaliza una columna clave de merge a entero del menor ancho seguro.
+
+        Coerciona a numérico, descarta las filas sin clave y baja el ancho
+        (int32/int16 cuando el rango lo permite). Una máscara booleana y un
+        solo gather sobre el ndarray reemplazan la cadena to_numeric ->
+        dropna -> astype que recorría el frame tres veces, y las claves
+        angostas reducen los bytes hasheados en cada join.
+        """
+        vals = pd.to_numeric(frame[column], errors="coerce")
+        good = vals.notna().to_numpy()
+        if not good.all():
+            frame = frame.iloc[good]
+        frame[column] = pd.to_numeric(vals.to_numpy()[good], downcast="integer")
+        return frame
+
     def _process_anomalies(self) -> pd.DataFrame:
         """Filters and cleans the anomalies data for the target year."""
         if self.df_anomalies is None:
@@ -63,24 +113,38 @@ class DataProcessingService:
                 "La columna 'año' no existe en el DataFrame de anomalías. Intentando extraer año de 'Ejecucion'..."
             )
 
-            # Si aún no tenemos la columna año, crear la columna con el valor de target_year
-            self.logger.warning(
-                f"Usando el año objetivo {self.target_year} para todos los registros."
-            )
-            self.df_anomalies["año"] = self.target_year
+            if "Ejecucion" in self.df_anomalies.columns:
+                # Las fechas de ejecución se repiten miles de veces: parsear
+                # solo los valores únicos y mapear de vuelta es mucho más
+                # barato que un strptime por fila
+                uniq = self.df_anomalies["Ejecucion"].unique()
+                parsed = pd.to_datetime(pd.Series(uniq), errors="coerce", cache=True)
+                year_map = dict(zip(uniq, parsed.dt.year))
+                self.df_anomalies["año"] = (
+                    self.df_anomalies["Ejecucion"].map(year_map).astype("Int32")
+                )
+                self.logger.info("Año extraído de 'Ejecucion' para las anomalías.")
+            else:
+                # Si aún no tenemos la columna año, crear la columna con el valor de target_year
+                self.logger.warning(
+                    f"Usando el año objetivo {self.target_year} para todos los registros."
+                )
+                self.df_anomalies["año"] = self.target_year
 
-            # Asegurar que la columna 'año' sea numérica
-            self.df_anomalies["año"] = pd.to_numeric(
-                self.df_anomalies["año"], errors="coerce"
-            )
-            self.logger.info(f"add year {self.target_year} on anomalies data...")
+                # Asegurar que la columna 'año' sea numérica
+                self.df_anomalies["año"] = pd.to_numeric(
+                    self.df_anomalies["año"], errors="coerce"
+                )
+                self.logger.info(f"add year {self.target_year} on anomalies data...")
 
         self.logger.info(f"Processing anomalies for the year {self.target_year}...")
 
-        # Filter by target year
-        anom_filtered_year = self.df_anomalies[
-            self.df_anomalies["año"] == self.target_year
-        ].copy()
+        # Filter by target year (query fusiona comparación+gather y usa
+        # numexpr cuando está instalado)
+        # query ya materializa un frame nuevo; copiarlo otra vez duplicaba
+        # la asignación más grande de este paso
+        target_year = self.target_year
+        anom_filtered_year = self.df_anomalies.query("año == @target_year")
         self.logger.info(
             f"Found {len(anom_filtered_year)} anomaly records for {self.target_year}."
         )
@@ -91,23 +155,28 @@ class DataProcessingService:
             return pd.DataFrame(columns=["Orden", "Descripcion"])
 
         # Clean duplicate 'Orden' based on 'Revision'
+        # La máscara de Revision faltante se toma con isna() sobre la columna
+        # original: una lectura del bitmask nulo en vez de castear a str,
+        # pasar a minúsculas y comparar contra 'nan' elemento a elemento
+        missing_revision = anom_filtered_year["Revision"].isna().to_numpy()
+
         # Convert relevant columns to string for comparison, handling potential NaNs
         anom_filtered_year["Orden"] = anom_filtered_year["Orden"].astype(
             str
         )  # Keep Orden type consistent if needed later
-        anom_filtered_year["Revision"] = anom_filtered_year["Revision"].astype(str)
         anom_filtered_year["Codigo"] = anom_filtered_year["Codigo"].astype(
             str
         )  # As per notebook
 
-        # Identify duplicates and NaN revisions
-        is_duplicated_orden = anom_filtered_year.duplicated(subset="Orden", keep=False)
-        is_nan_revision = (
-            anom_filtered_year["Revision"].str.lower() == "nan"
-        )  # Ensure case-insensitivity
-
-        # Keep rows that are NOT (duplicated AND have NaN revision)
-        anom_cleaned = anom_filtered_year[~(is_duplicated_orden & is_nan_revision)]
+        # Un único sort+dedup reemplaza las dos máscaras booleanas completas
+        # y su combinación: queda una fila por Orden, prefiriendo las que
+        # tienen Revision informada sobre las faltantes
+        anom_cleaned = (
+            anom_filtered_year.assign(_rank=missing_revision.astype("int8"))
+            .sort_values(["Orden", "_rank"], kind="stable")
+            .drop_duplicates("Orden", keep="first")
+            .drop(columns="_rank")
+        )
         self.logger.info(f"Cleaned anomalies data size: {len(anom_cleaned)} rows.")
 
         # Select and return relevant columns
@@ -118,69 +187,45 @@ class DataProcessingService:
         if self.df_plain is None:
             raise ValueError("Plain data not loaded.")
 
-        df_merged = base_df.copy()
-        logging.info(f"Merging item data for IDs: {self.item_ids}")
+        item_ids = sorted(self.item_ids)
+        logging.info(f"Merging item data for IDs: {item_ids}")
+
+        # Un solo filtrado + pivot + merge en lugar de un hash-join completo
+        # sobre el frame base por cada item_id (cada merge del bucle anterior
+        # reconstruía el DataFrame entero). Las filas por id salen de la
+        # partición precalculada, sin escaneos booleanos del frame plano.
+        # Cada gather por id es independiente; con joblib en modo hilos los
+        # take corren en paralelo (pandas suelta el GIL en la copia de bloques)
+        groups = self._plain_groups()
+        present_ids = [item_id for item_id in item_ids if item_id in groups]
+        frames = Parallel(n_jobs=-1, prefer="threads")(
+            delayed(self._plain_rows)(item_id) for item_id in present_ids
+        )
 
-        for item_id in self.item_ids:
-            logging.debug(f"Processing item_id: {item_id}")
-            # Ensure we are checking against the correct column ('id') in df_plain
-            df_item_all = self.df_plain[self.df_plain["id"] == item_id]
+        if frames:
+            sub = pd.concat(frames)[["odt", "id", "value"]].drop_duplicates(
+                subset=["odt", "id"], keep="first"
+            )
+            if isinstance(sub["id"].dtype, pd.CategoricalDtype):
+                # Volver al dtype de las categorías: pivot sobre una columna
+                # categórica materializaría columnas para ids no observados
+                sub["id"] = sub["id"].astype(sub["id"].cat.categories.dtype)
+            wide = sub.pivot(index="odt", columns="id", values="value")
+            wide.columns = [f"item_{item_id}" for item_id in wide.columns]
+            df_merged = base_df.merge(wide, left_on="odt", right_index=True, how="left")
+        else:
+            df_merged = base_df.copy()
 
-            if df_item_all.empty:
+        # Mantener una columna object toda-NA por cada id sin datos, igual
+        # que hacía el merge id por id, para no romper el código posterior
+        for item_id in item_ids:
+            col_name = f"item_{item_id}"
+            if col_name not in df_merged.columns:
                 logging.warning(
                     f"No data found for item_id {item_id} in the plain dataset. Skipping merge for this ID."
                 )
-                # Create an empty column with the expected name and appropriate type (e.g., object or float)
-                # This prevents errors later if subsequent code expects the column.
-                # We'll default to object type, adjust if a specific type is known.
-                df_merged[f"item_{item_id}"] = pd.NA
-                df_merged[f"item_{item_id}"] = df_merged[f"item_{item_id}"].astype(
-                    "object"
-                )  # Or choose a default type
-                continue  # Skip to the next id
-
-            # Select only necessary columns and make a copy
-            df_item = df_item_all[["odt", "value"]].copy()
-
-            # Drop duplicates based on 'odt' *before* merging
-            df_item = df_item.drop_duplicates(subset="odt", keep="first")
-
-            # Check if df_item is empty *after* filtering and deduplication
-            if df_item.empty:
-                logging.warning(
-                    f"No unique 'odt' data found for item_id {item_id} after deduplication. Skipping merge."
-                )
-                df_merged[f"item_{item_id}"] = pd.NA
-                df_merged[f"item_{item_id}"] = df_merged[f"item_{item_id}"].astype(
-                    "object"
-                )
-                continue
-
-            # Perform the merge
-            df_merged = pd.merge(
-                df_merged,
-                df_item,
-                on="odt",
-                how="left",  # Left join to keep all rows from the base df
-            )
-
-            # Rename the merged 'value' column
-            # Check if 'value' column exists before renaming (it should after a successful merge)
-            if "value" in df_merged.columns:
-                df_merged = df_merged.rename(columns={"value": f"item_{item_id}"})
-                logging.debug(
-                    f"Successfully merged and renamed data for item_id: {item_id}"
-                )
-            else:
-                # This case might happen if the merge somehow didn't add the column,
-                # or if multiple merges happen without renaming in between (less likely with this loop structure).
-                logging.error(
-                    f"Column 'value' not found after merging item_id {item_id}. Cannot rename."
-                )
-                # Handle error: Maybe add the column manually with NAs or raise an exception
-                df_merged[f"item_{item_id}"] = pd.NA
-                df_merged[f"item_{item_id}"] = df_merged[f"item_{item_id}"].astype(
-                    "object"
+                df_merged[col_name] = pd.Series(
+                    pd.NA, index=df_merged.index, dtype="object"
                 )
 
         return df_merged
@@ -255,7 +300,7 @@ class DataProcessingService:
             1349: "float64",
         }
 
-        for item_id in self.item_ids:
+        for item_id in sorted(self.item_ids):
             col_name = f"item_{item_id}"
             # Only add dtype mapping if the column actually exists in the DataFrame
             if col_name in df.columns:
@@ -263,59 +308,74 @@ class DataProcessingService:
                 dtype_mapping[col_name] = notebook_item_dtypes.get(item_id, "object")
             # If the column doesn't exist (e.g., due to skipped merge), don't add it to dtype_mapping
 
-        for col, dtype in dtype_mapping.items():
-            # Check again if column exists before trying conversion
-            if col in df.columns:
-                try:
-                    # Handle potential conversion issues, especially with Int64
-                    if pd.api.types.is_integer_dtype(dtype) and df[col].isnull().any():
-                        # Use pandas nullable integer type if NaNs are present
-                        df[col] = df[col].astype(pd.Int64Dtype())
-                    elif pd.api.types.is_float_dtype(dtype):
-                        # Coerce errors during numeric conversion for floats
-                        df[col] = pd.to_numeric(df[col], errors="coerce")
-                        df[col] = df[col].astype(dtype)  # Apply specific float type
-                    elif dtype == "object":
-                        # Convert potential numerical NaNs/NAs to actual None for object types
-                        # Ensure it's string first, then replace various null representations
-                        df[col] = (
-                            df[col]
-                            .astype(str)
-                            .replace({"nan": None, "<NA>": None, "None": None})
-                        )
-                    else:
-                        # For other types, attempt direct conversion
-                        df[col] = df[col].astype(dtype)
-
-                except Exception as e:
-                    logging.warning(
-                        f"Could not convert column '{col}' to {dtype}: {e}. Attempting safe conversion."
-                    )
-                    # Fallback conversions
-                    try:
-                        if pd.api.types.is_integer_dtype(dtype):
-                            # Try converting to float first, then nullable Int
-                            df[col] = pd.to_numeric(df[col], errors="coerce").astype(
-                                pd.Int64Dtype()
-                            )
-                        elif pd.api.types.is_float_dtype(dtype):
-                            df[col] = pd.to_numeric(df[col], errors="coerce")
-                        elif dtype == "object":
-                            # Ensure conversion to string and replace null representations
-                            df[col] = (
-                                df[col]
-                                .astype(str)
-                                .replace({"nan": None, "<NA>": None, "None": None})
-                            )
-                        else:
-                            logging.error(
-                                f"Unhandled conversion error for column '{col}' to {dtype}."
-                            )
-                            # Keep column as is or handle differently
-                    except Exception as fallback_e:
-                        logging.error(
-                            f"Fallback conversion failed for column '{col}' to {dtype}: {fallback_e}"
-                        )
+        # Conversión vectorizada por grupo de dtype destino: una pasada por
+        # grupo en lugar del bucle por-columna con try/except individual
+        present = {
+            col: dtype for col, dtype in dtype_mapping.items() if col in df.columns
+        }
+        float_cols = [
+            col for col, dtype in present.items() if pd.api.types.is_float_dtype(dtype)
+        ]
+        int_cols = [
+            col
+            for col, dtype in present.items()
+            if pd.api.types.is_integer_dtype(dtype)
+        ]
+        object_cols = [col for col, dtype in present.items() if dtype == "object"]
+
+        # Las columnas que ya llegan numéricas se convierten con un solo
+        # astype(dict) (despacho por bloque); to_numeric con coerce queda
+        # solo para las que vienen como texto y pueden traer valores sucios
+        ready_floats = {
+            col: "float64"
+            for col in float_cols
+            if pd.api.types.is_numeric_dtype(df[col])
+        }
+        coerce_floats = [col for col in float_cols if col not in ready_floats]
+        if ready_floats:
+            df = df.astype(ready_floats)
+        if coerce_floats:
+            try:
+                df[coerce_floats] = df[coerce_floats].apply(
+                    pd.to_numeric, errors="coerce"
+                ).astype("float64")
+            except Exception as e:
+                logging.warning(f"Could not convert float columns {coerce_floats}: {e}")
+
+        int32_min, int32_max = -(2**31), 2**31 - 1
+        for col in int_cols:
+            try:
+                serie = pd.to_numeric(df[col], errors="coerce")
+                # Int32 alcanza para los ids del proyecto y usa la mitad de
+                # memoria; si el rango no cabe se cae al entero anulable de
+                # 64 bits. Ambos toleran los nulos que introduce el coerce.
+                fits_int32 = serie.dropna().between(int32_min, int32_max).all()
+                df[col] = serie.astype("Int32" if fits_int32 else "Int64")
+            except Exception as e:
+                logging.warning(f"Could not convert column '{col}' to integer: {e}")
+
+        if object_cols:
+            try:
+                # Normalizar nulos con una máscara booleana: una pasada sobre
+                # las columnas en lugar de materializarlas completas como str
+                # y volver a copiarlas con replace
+                sub = df[object_cols]
+                bad = sub.isna() | sub.isin(["nan", "<NA>", "None"])
+                if bad.to_numpy().any():
+                    df[object_cols] = sub.where(~bad, None)
+            except Exception as e:
+                logging.warning(f"Could not convert object columns {object_cols}: {e}")
+
+        # Campos de texto de cardinalidad baja a ``category``: los códigos se
+        # comparan como enteros pequeños en merges/groupby y la columna deja
+        # de guardar un str de Python por celda. Las columnas item_* quedan
+        # como object a propósito: la limpieza posterior les asigna valores
+        # nuevos que un dtype categórico rechazaría.
+        n_rows = len(df)
+        if n_rows:
+            for col in ("AREA", "PLAN_COMERCIAL", "ZONA"):
+                if col in df.columns and df[col].nunique() / n_rows < 0.05:
+                    df[col] = df[col].astype("category")
 
         logging.info("Data type conversion complete.")
         # Optional: print dtypes for verification
@@ -417,9 +477,13 @@ class DataProcessingService:
             "SUB_CATEGORIA",
             "puntaje",
         ]
-        df_merge_anom_pond_us = df_merge_anom_pond_us[columnas_deseadas].copy()
-        df_merge_anom_pond_us = df_merge_anom_pond_us.drop_duplicates().copy()
-        df_merge_anom_pond_us = df_merge_anom_pond_us.dropna(subset="ZONA").copy()
+        # drop_duplicates y dropna ya devuelven un frame nuevo; el .copy()
+        # posterior solo duplicaba el resultado antes de una escritura de lectura
+        df_merge_anom_pond_us = df_merge_anom_pond_us[columnas_deseadas]
+        df_merge_anom_pond_us = df_merge_anom_pond_us.drop_duplicates(
+            subset=[c for c in self.DEDUP_KEYS if c in df_merge_anom_pond_us.columns]
+        )
+        df_merge_anom_pond_us = df_merge_anom_pond_us.dropna(subset="ZONA")
         # Guardamos el resultado para su uso posterior en el pipeline
         self.processed_data = df_merge_anom_pond_us
 
@@ -492,8 +556,11 @@ class DataProcessingService:
             how="right",
         )
 
-        df_merge_anom_pond_us = df_merge_anom_pond_us.drop_duplicates().copy()
-        df_merge_anom_pond_us = df_merge_anom_pond_us.dropna(subset="ZONA").copy()
+        # Igual que en merge_and_clean: el resultado ya es un frame nuevo
+        df_merge_anom_pond_us = df_merge_anom_pond_us.drop_duplicates(
+            subset=[c for c in self.DEDUP_KEYS if c in df_merge_anom_pond_us.columns]
+        )
+        df_merge_anom_pond_us = df_merge_anom_pond_us.dropna(subset="ZONA")
         # Guardamos el resultado para su uso posterior en el pipeline
         self.processed_data = df_merge_anom_pond_us
 
@@ -531,12 +598,20 @@ class DataProcessingService:
         self.df_users = users_df
         self.df_plain = plain_df
         self.df_uid_conversion = uid_conversion_df
+        self._plain_by_id = None  # invalidar la partición del df_plain anterior
+
+        # id como category: las comparaciones y el groupby trabajan sobre
+        # códigos enteros angostos en lugar de la columna int64 completa
+        if "id" in self.df_plain.columns:
+            self.df_plain["id"] = self.df_plain["id"].astype("category")
 
         # --- Step 1: Prepare initial data (Zonas and ODT Number) ---
         logging.info("Step 1: Preparing initial zone and ODT number data...")
 
-        df_zonas = self.df_plain[self.df_plain["id"] == self.ZONA_ID].copy()
-        df_odt_number = self.df_plain[self.df_plain["id"] == self.ODT_NUMBER_ID].copy()
+        # take ya entrega un frame nuevo por cada id; el .copy() adicional
+        # repetía en memoria las dos rebanadas más anchas del pipeline
+        df_zonas = self._plain_rows(self.ZONA_ID)
+        df_odt_number = self._plain_rows(self.ODT_NUMBER_ID)
 
         # Remove duplicates from odt_number before mapping
         df_odt_number = df_odt_number.drop_duplicates(subset="odt")
@@ -546,67 +621,42 @@ class DataProcessingService:
 
         # --- Step 2: Map ODT Number (item_288) onto Zone data ---
         logging.info("Step 2: Mapping ODT number (item_288)...")
-        odt_map = df_odt_number.set_index("odt")["value"]
-        df_zonas["item_288"] = df_zonas["odt"].map(odt_map)
-
-        # Drop rows where mapping failed (NaNs in item_288)
+        # Hash-join en Cython en lugar de Series.map fila a fila; el inner
+        # join fusiona el mapeo y el descarte de filas sin item_288
         initial_rows = len(df_zonas)
-        df_zonas.dropna(subset=["item_288"], inplace=True)
+        df_zonas = df_zonas.merge(
+            df_odt_number[["odt", "value"]].rename(columns={"value": "item_288"}),
+            on="odt",
+            how="inner",
+            validate="m:1",
+        )
         dropped_rows = initial_rows - len(df_zonas)
         logging.info(f"Dropped {dropped_rows} rows due to missing item_288 mapping.")
         logging.info(f"DataFrame size after item_288 mapping: {len(df_zonas)} rows.")
 
         # Ensure item_288 is integer for merging
-        try:
-            # Attempt direct conversion first
-            df_zonas["item_288"] = df_zonas["item_288"].astype(int)
-        except (ValueError, TypeError) as e:
+        rows_before_key = len(df_zonas)
+        df_zonas = self._as_key(df_zonas, "item_288")
+        if rows_before_key > len(df_zonas):
             logging.warning(
-                f"Could not directly convert 'item_288' to int after mapping: {e}. Coercing to numeric."
+                f"Dropped {rows_before_key - len(df_zonas)} additional rows due to non-numeric 'item_288' values."
             )
-            # Coerce to numeric, errors='coerce' will turn non-numeric into NaN
-            df_zonas["item_288"] = pd.to_numeric(df_zonas["item_288"], errors="coerce")
-            # Drop rows that became NaN after coercion
-            rows_before_coerce_drop = len(df_zonas)
-            df_zonas.dropna(subset=["item_288"], inplace=True)
-            rows_after_coerce_drop = len(df_zonas)
-            if rows_before_coerce_drop > rows_after_coerce_drop:
-                logging.warning(
-                    f"Dropped {rows_before_coerce_drop - rows_after_coerce_drop} additional rows due to non-numeric 'item_288' values."
-                )
-            # Now convert to nullable integer type Int64 to handle potential NaNs if any remained (shouldn't if dropna worked)
-            # Or convert directly to int if certain no NaNs remain
-            df_zonas["item_288"] = df_zonas["item_288"].astype(
-                int
-            )  # or pd.Int64Dtype() if NaNs are possible
 
-        # --- Step 3: Merge with User Data ---
-        logging.info("Step 3: Merging with user data...")
+        # --- Steps 3 & 4: Merge with User and UID Conversion Data ---
+        logging.info("Steps 3-4: Merging with user and UID conversion data...")
 
         # Select necessary columns from df_zonas before merge
         # Make sure required merge key 'item_288' exists and is correct type
         if "item_288" not in df_zonas.columns:
             raise KeyError("'item_288' column missing before merging with user data.")
-        if not pd.api.types.is_integer_dtype(df_zonas["item_288"]):
-            logging.warning(
-                "Attempting merge while 'item_288' is not integer. Converting."
+        if "PRODUCTO" not in self.df_users.columns:
+            raise KeyError("'PRODUCTO' column missing in user data.")
+        try:
+            self.df_users = self._as_key(self.df_users, "PRODUCTO")
+        except Exception as e:
+            raise TypeError(
+                f"Failed to ensure merge keys ('item_288', 'PRODUCTO') are compatible integers: {e}"
             )
-            # Assuming PRODUCTO in user data is numeric or can be coerced
-            try:
-                self.df_users["PRODUCTO"] = pd.to_numeric(
-                    self.df_users["PRODUCTO"], errors="coerce"
-                )
-                self.df_users.dropna(
-                    subset=["PRODUCTO"], inplace=True
-                )  # Drop users with non-numeric PRODUCTO
-                self.df_users["PRODUCTO"] = self.df_users["PRODUCTO"].astype(int)
-                df_zonas["item_288"] = df_zonas["item_288"].astype(
-                    int
-                )  # Ensure left key is also int
-            except Exception as e:
-                raise TypeError(
-                    f"Failed to ensure merge keys ('item_288', 'PRODUCTO') are compatible integers: {e}"
-                )
 
         # Select columns from user data, ensure PRODUCTO exists
         user_cols = [
@@ -622,24 +672,8 @@ class DataProcessingService:
         if missing_user_cols:
             raise KeyError(f"Missing required columns in user data: {missing_user_cols}")
 
-        df_merged_users = pd.merge(
-            df_zonas[["odt", "item_288"]],  # Include only necessary columns from left
-            self.df_users[user_cols],  # Select required columns from right
-            left_on="item_288",
-            right_on="PRODUCTO",
-            how="inner",  # As per notebook logic
-        )
-        # Drop the redundant PRODUCTO column from the merge
-        df_merged_users = df_merged_users.drop(columns=["PRODUCTO"])
-        logging.info(
-            f"DataFrame size after user data merge: {len(df_merged_users)} rows."
-        )
-
-        # --- Step 4: Merge with UID Conversion Data ---
-        logging.info("Step 4: Merging with UID conversion data...")
-
         # Ensure merge keys 'odt' and 'uid' exist and are compatible
-        if "odt" not in df_merged_users.columns:
+        if "odt" not in df_zonas.columns:
             raise KeyError(
                 "'odt' column missing before merging with UID conversion data."
             )
@@ -655,31 +689,30 @@ class DataProcessingService:
         # Optional: Check/convert types if necessary (e.g., if 'odt' or 'uid' might be strings)
         # Assuming they are numeric based on notebook context
         try:
-            df_merged_users["odt"] = pd.to_numeric(
-                df_merged_users["odt"], errors="coerce"
-            ).astype(pd.Int64Dtype())
-            self.df_uid_conversion["uid"] = pd.to_numeric(
-                self.df_uid_conversion["uid"], errors="coerce"
-            ).astype(pd.Int64Dtype())
-            # Drop NaNs that might result from coercion if needed
-            df_merged_users.dropna(subset=["odt"], inplace=True)
-            self.df_uid_conversion.dropna(subset=["uid"], inplace=True)
+            df_zonas = self._as_key(df_zonas, "odt")
+            self.df_uid_conversion = self._as_key(self.df_uid_conversion, "uid")
         except Exception as e:
             logging.warning(
                 f"Could not ensure 'odt' and 'uid' are numeric types for merge: {e}"
             )
 
-        df_merged_uid = pd.merge(
-            df_merged_users,
-            self.df_uid_conversion[uid_cols],  # Select only needed columns
-            left_on="odt",
-            right_on="uid",
-            how="inner",  # As per notebook logic
+        # Los dos lados derechos se indexan por su clave y se encadenan
+        # joins por índice (merge ordenado) en lugar de dos hash-joins con
+        # intermedio ancho; reset_index recupera cada clave como columna,
+        # por lo que PRODUCTO y uid ya no entran duplicados al resultado
+        users_idx = self.df_users[user_cols].set_index("PRODUCTO")
+        uid_idx = self.df_uid_conversion[uid_cols].set_index("uid")
+        df_merged_uid = (
+            df_zonas[["odt", "item_288"]]
+            .set_index("item_288")
+            .join(users_idx, how="inner")
+            .reset_index()
+            .set_index("odt")
+            .join(uid_idx, how="inner")
+            .reset_index()
         )
-        # Drop the redundant uid column
-        df_merged_uid = df_merged_uid.drop(columns=["uid"])
         logging.info(
-            f"DataFrame size after UID conversion merge: {len(df_merged_uid)} rows."
+            f"DataFrame size after user and UID conversion merges: {len(df_merged_uid)} rows."
         )
         # Check if 'orden' column exists after merge
         if "orden" not in df_merged_uid.columns:
@@ -712,17 +745,11 @@ class DataProcessingService:
         else:
             # Convert merge keys to compatible types (e.g., both int or both str)
             try:
-                # Try converting both to Int64 (nullable integer)
-                df_merged_uid["orden"] = pd.to_numeric(
-                    df_merged_uid["orden"], errors="coerce"
-                ).astype(pd.Int64Dtype())
-                df_anomalies_processed["Orden"] = pd.to_numeric(
-                    df_anomalies_processed["Orden"], errors="coerce"
-                ).astype(pd.Int64Dtype())
-
-                # Drop rows where conversion failed (became NaT/NaN)
-                df_merged_uid.dropna(subset=["orden"], inplace=True)
-                df_anomalies_processed.dropna(subset=["Orden"], inplace=True)
+                # Normalizar ambas claves en una sola pasada cada una
+                df_merged_uid = self._as_key(df_merged_uid, "orden")
+                df_anomalies_processed = self._as_key(
+                    df_anomalies_processed, "Orden"
+                )
 
                 logging.info("Merging anomalies using integer keys ('orden', 'Orden').")
                 df_merged_anomalies = pd.merge(
@@ -734,37 +761,36 @@ class DataProcessingService:
                 )
             except Exception as e_int:
                 logging.warning(
-                    f"Integer merge failed for anomalies ({e_int}). Trying string merge."
+                    f"Integer merge failed for anomalies ({e_int}). Trying hashed-key merge."
                 )
                 try:
-                    # Fallback to string merge
-                    df_merged_uid["orden_str"] = df_merged_uid["orden"].astype(str)
-                    df_anomalies_processed["Orden_str"] = df_anomalies_processed[
-                        "Orden"
-                    ].astype(str)
+                    # Fallback con clave canónica uint64: hash_array corre en
+                    # C sobre los bytes crudos de cada lado, sin materializar
+                    # un str de Python por fila como el antiguo astype(str)
+                    df_merged_uid["_orden_key"] = pd.util.hash_array(
+                        df_merged_uid["orden"].to_numpy()
+                    )
+                    df_anomalies_processed["_orden_key"] = pd.util.hash_array(
+                        df_anomalies_processed["Orden"].to_numpy()
+                    )
 
                     logging.info(
-                        "Merging anomalies using string keys ('orden_str', 'Orden_str')."
+                        "Merging anomalies using hashed keys ('_orden_key')."
                     )
                     df_merged_anomalies = pd.merge(
                         df_merged_uid,
                         df_anomalies_processed,
-                        left_on="orden_str",
-                        right_on="Orden_str",
+                        on="_orden_key",
                         how="left",
                     )
-                    # Drop temporary string columns
+                    # Drop the temporary key column
                     df_merged_anomalies.drop(
-                        columns=["orden_str"], inplace=True, errors="ignore"
+                        columns=["_orden_key"], inplace=True, errors="ignore"
                     )
-                    if "Orden_str" in df_merged_anomalies.columns:
-                        df_merged_anomalies.drop(
-                            columns=["Orden_str"], inplace=True
-                        )  # Might not be present after left merge
 
-                except Exception as e_str:
+                except Exception as e_hash:
                     logging.error(
-                        f"String merge also failed for anomalies ({e_str}). Skipping merge."
+                        f"Hashed-key merge also failed for anomalies ({e_hash}). Skipping merge."
                     )
                     if "Descripcion" not in df_merged_uid.columns:
                         df_merged_uid["Descripcion"] = None
@@ -806,7 +832,9 @@ class DataProcessingService:
             col for col in base_columns if col in df_merged_anomalies.columns
         ]
         logging.info(f"Using existing base columns: {base_columns_existing}")
-        df_base_for_items = df_merged_anomalies[base_columns_existing].copy()
+        # _merge_items sólo lee su entrada (el merge produce un frame
+        # nuevo), así que basta la proyección sin copiar el bloque entero
+        df_base_for_items = df_merged_anomalies[base_columns_existing]
 
         df_final_items = self._merge_items(df_base_for_items)
         logging.info(
@@ -886,18 +914,14 @@ class DataProcessingService:
 
         # Estadísticas de los datos procesados
         if self.processed_data is not None and not self.processed_data.empty:
+            # Una sola pasada de isna alimenta el total y el porcentaje
+            total_missing = int(self.processed_data.isna().sum().sum())
+            total_cells = len(self.processed_data) * len(self.processed_data.columns)
             processed_stats = {
                 "rows": len(self.processed_data),
                 "columns": len(self.processed_data.columns),
-                "missing_values": self.processed_data.isna().sum().sum(),
-                "missing_percentage": round(
-                    (
-                        self.processed_data.isna().sum().sum()
-                        / (len(self.processed_data) * len(self.processed_data.columns))
-                    )
-                    * 100,
-                    2,
-                ),
+                "missing_values": total_missing,
+                "missing_percentage": round(total_missing / total_cells * 100, 2),
             }
 
             # Información sobre tipos de datos
@@ -907,12 +931,11 @@ class DataProcessingService:
             }
             processed_stats["data_types"] = dtype_counts
 
-            # Lista de columnas por tipo
+            # Lista de columnas por tipo, agrupada en un solo recorrido de
+            # la Serie dtypes en vez de un select_dtypes por cada tipo
             dtype_columns = {}
-            for dtype in set(self.processed_data.dtypes):
-                cols = list(self.processed_data.select_dtypes(include=[dtype]).columns)
-                if cols:
-                    dtype_columns[str(dtype)] = cols
+            for col, dtype in self.processed_data.dtypes.items():
+                dtype_columns.setdefault(str(dtype), []).append(col)
             processed_stats["columns_by_type"] = dtype_columns
 
             # Número de ítems encontrados
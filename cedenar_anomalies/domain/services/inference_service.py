@@ -4,6 +4,8 @@ from datetime import datetime
 
 import pandas as pd
 
+from cedenar_anomalies.utils.io import read_csv_fast
+
 
 class InferenceService:
     def __init__(self, repository, logger=None):
@@ -23,8 +25,11 @@ class InferenceService:
         self.logger.info(f"Cargando datos desde {file_path}")
 
         try:
-            # Leer el archivo CSV
-            df = pd.read_csv(file_path, low_memory=False)
+            # Leer el archivo (Parquet o CSV)
+            if str(file_path).endswith(".parquet"):
+                df = pd.read_parquet(file_path)
+            else:
+                df = read_csv_fast(file_path)
             self.logger.info(
                 f"Archivo CSV cargado con éxito. {len(df)} filas encontradas."
             )
@@ -1,9 +1,12 @@
 # cedenar_anomalies/infrastructure/adapters/repositories/sql_anomalia_repository.py
+import io
 import logging
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pv
 from sqlalchemy import select
 
 from cedenar_anomalies.domain.ports.repositories import IAnomaliaRepository
@@ -50,6 +53,29 @@ class SQLAnomaliaRepository(IAnomaliaRepository):
             result = session.execute(query).scalars().all()
             return list(result)
 
+    def _copy_from_dataframe(self, df: pd.DataFrame) -> int:
+        """
+        Ingiere un DataFrame vía ``COPY FROM STDIN`` de PostgreSQL.
+
+        El frame se serializa una sola vez a CSV con pyarrow y el servidor
+        lo ingiere como un stream: ni un objeto ORM ni un INSERT por fila.
+        """
+        buffer = io.BytesIO()
+        pv.write_csv(pa.Table.from_pandas(df, preserve_index=False), buffer)
+        buffer.seek(0)
+
+        columns = ", ".join(f'"{col}"' for col in df.columns)
+        with Session() as session:
+            raw_connection = session.connection().connection
+            with raw_connection.cursor() as cursor:
+                cursor.copy_expert(
+                    f"COPY {AnomaliaData.__tablename__} ({columns}) "
+                    "FROM STDIN WITH (FORMAT csv, HEADER true)",
+                    buffer,
+                )
+            session.commit()
+        return len(df)
+
     def save_from_dataframe(self, df: pd.DataFrame) -> int:
         """Guarda anomalías desde un DataFrame"""
         self.logger.info(
@@ -60,12 +86,25 @@ class SQLAnomaliaRepository(IAnomaliaRepository):
         if "fecha_creacion" not in df.columns:
             df["fecha_creacion"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
+        # Filtrar una sola vez las columnas válidas para el modelo
+        valid_columns = [col for col in df.columns if hasattr(AnomaliaData, col)]
+        df_valid = df[valid_columns]
+
+        # Camino rápido: COPY en bloque; si el driver o el dialecto no lo
+        # soportan se cae a la inserción ORM por lotes
+        try:
+            saved_count = self._copy_from_dataframe(df_valid)
+            self.logger.info(f"Guardados {saved_count} registros vía COPY")
+            return saved_count
+        except Exception as e:
+            self.logger.warning(
+                f"COPY no disponible ({e}); usando inserción ORM por lotes."
+            )
+
         # Convertir DataFrame a objetos del dominio
         anomalias = []
-        for _, row in df.iterrows():
-            # Filtrar campos válidos para el modelo
-            valid_fields = {k: v for k, v in row.items() if hasattr(AnomaliaData, k)}
-            anomalias.append(AnomaliaData(**valid_fields))
+        for row in df_valid.itertuples(index=False):
+            anomalias.append(AnomaliaData(**row._asdict()))
 
         # Guardar en lotes
         batch_size = 1000
@@ -0,0 +1,210 @@
+# cedenar_anomalies/utils/io.py
+
+import logging
+from pathlib import Path
+from typing import Iterable, Mapping, Optional, Union
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pv
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+# Tamaño de bloque de lectura para pyarrow (64 MiB)
+DEFAULT_BLOCK_SIZE = 64 << 20
+
+# Columnas de baja cardinalidad compartidas por los datasets del proyecto
+CATEGORICAL_COLS = ("ZONA", "AREA", "PLAN_COMERCIAL")
+
+
+def enable_copy_on_write() -> None:
+    """
+    Activa el modo copy-on-write de pandas para el proceso.
+
+    Las proyecciones pasan como vistas y sólo se copia un bloque si alguien
+    lo escribe, en lugar de copiar defensivamente. Debe llamarse desde los
+    puntos de entrada para que todos compartan la misma semántica de aliasing.
+    """
+    pd.set_option("mode.copy_on_write", True)
+
+
+def as_categorical(
+    df: pd.DataFrame, columns: Iterable[str] = CATEGORICAL_COLS
+) -> pd.DataFrame:
+    """
+    Convierte columnas de baja cardinalidad a dtype ``category``.
+
+    Reduce la memoria de columnas de texto repetitivo a un arreglo de
+    códigos enteros y acelera groupby/merge sobre esas columnas.
+
+    Args:
+        df: DataFrame a convertir (se modifica in situ)
+        columns: Columnas a convertir si están presentes
+
+    Returns:
+        El mismo DataFrame con las columnas convertidas
+    """
+    for col in columns:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    return df
+
+
+def read_csv_fast(
+    path: Union[str, Path],
+    columns: Optional[Iterable[str]] = None,
+    column_types: Optional[Mapping[str, pa.DataType]] = None,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+) -> pd.DataFrame:
+    """
+    Lee un archivo CSV usando el motor multihilo de pyarrow.
+
+    A diferencia del motor C de pandas, pyarrow parsea el CSV en
+    paralelo y construye buffers columnares, lo que reduce el tiempo
+    de carga y el consumo de memoria en archivos grandes. Declarar los
+    tipos de columna evita además la pasada de inferencia de dtypes.
+
+    Args:
+        path: Ruta al archivo CSV
+        columns: Lista opcional de columnas a cargar (proyección)
+        column_types: Mapeo opcional columna -> tipo pyarrow (esquema)
+        block_size: Tamaño de bloque de lectura en bytes
+
+    Returns:
+        DataFrame con el contenido del archivo
+    """
+    read_options = pv.ReadOptions(use_threads=True, block_size=block_size)
+    convert_kwargs = {}
+    if columns:
+        convert_kwargs["include_columns"] = list(columns)
+    if column_types:
+        convert_kwargs["column_types"] = dict(column_types)
+    convert_options = pv.ConvertOptions(**convert_kwargs) if convert_kwargs else None
+    table = pv.read_csv(
+        str(path), read_options=read_options, convert_options=convert_options
+    )
+    return table.to_pandas()
+
+
+def read_csv_pushdown(
+    path: Union[str, Path],
+    columns: Optional[Iterable[str]] = None,
+    column_types: Optional[Mapping[str, pa.DataType]] = None,
+    filters: Optional[list] = None,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+) -> pd.DataFrame:
+    """
+    Lee un CSV con proyección y filtro de filas, cacheando una copia Parquet.
+
+    La primera lectura parsea el CSV con pyarrow y escribe un ``.parquet``
+    junto al original; las siguientes leen esa copia aplicando el filtro
+    durante la lectura: las estadísticas de cada row group descartan
+    bloques enteros antes de decodificarlos, así que las filas excluidas
+    nunca se materializan en memoria.
+
+    Args:
+        path: Ruta al archivo CSV
+        columns: Lista opcional de columnas a cargar (proyección)
+        column_types: Mapeo opcional columna -> tipo pyarrow para el parseo
+        filters: Filtro opcional estilo pyarrow.parquet, p. ej.
+            ``[("id", "in", [1, 288])]``
+        block_size: Tamaño de bloque de lectura del CSV en bytes
+
+    Returns:
+        DataFrame con las filas que pasan el filtro
+    """
+    path = Path(path)
+    cache_path = path.with_suffix(".parquet")
+
+    if not (
+        cache_path.exists() and cache_path.stat().st_mtime >= path.stat().st_mtime
+    ):
+        df = read_csv_fast(
+            path, columns=columns, column_types=column_types, block_size=block_size
+        )
+        try:
+            df.to_parquet(cache_path, compression="zstd")
+        except Exception as e:
+            logger.warning(f"No se pudo escribir la copia Parquet {cache_path}: {e}")
+            # Sin copia Parquet no hay pushdown: filtrar en memoria
+            if filters:
+                for col, op, values in filters:
+                    if op == "in" and col in df.columns:
+                        df = df[df[col].isin(values)]
+            return df
+
+    table = pq.read_table(
+        cache_path, columns=list(columns) if columns else None, filters=filters
+    )
+    return table.to_pandas()
+
+
+def read_excel_cached(path: Union[str, Path]) -> pd.DataFrame:
+    """
+    Lee un archivo Excel manteniendo una copia Parquet en caché.
+
+    ``pd.read_excel`` (openpyxl) parsea ZIP+XML en Python puro y es el
+    lector más lento de pandas. Si está disponible se usa el motor
+    ``calamine`` (Rust), que evita el objeto Python por celda de
+    openpyxl. En la primera lectura se escribe un ``.parquet`` junto al
+    archivo original; las lecturas siguientes usan esa copia columnar
+    mientras el ``.xlsx`` no cambie.
+
+    Args:
+        path: Ruta al archivo .xlsx
+
+    Returns:
+        DataFrame con el contenido del archivo
+    """
+    path = Path(path)
+    cache_path = path.with_suffix(".parquet")
+
+    if cache_path.exists() and cache_path.stat().st_mtime >= path.stat().st_mtime:
+        logger.debug(f"Usando copia Parquet en caché: {cache_path}")
+        return pd.read_parquet(cache_path)
+
+    try:
+        df = pd.read_excel(path, engine="calamine")
+    except (ImportError, ValueError) as e:
+        logger.debug(f"Motor calamine no disponible ({e}); usando openpyxl.")
+        df = pd.read_excel(path)
+    try:
+        df.to_parquet(cache_path, compression="zstd")
+    except Exception as e:
+        logger.warning(f"No se pudo escribir la copia Parquet {cache_path}: {e}")
+    return df
+
+
+def read_optional(reader, path: Union[str, Path]) -> Optional[pd.DataFrame]:
+    """
+    Lee un archivo si existe, devolviendo None ante errores o ausencia.
+
+    Args:
+        reader: Función de lectura que recibe la ruta y devuelve un DataFrame
+        path: Ruta del archivo a leer
+
+    Returns:
+        DataFrame leído, o None si el archivo no existe o la lectura falla
+    """
+    if not Path(path).exists():
+        return None
+    try:
+        return reader(path)
+    except Exception as e:
+        logger.warning(f"Error al cargar {path}: {e}")
+        return None
+
+
+def write_csv_fast(df: pd.DataFrame, path: Union[str, Path]) -> None:
+    """
+    Escribe un DataFrame como CSV usando pyarrow.
+
+    Evita el formateo fila a fila de ``DataFrame.to_csv``, serializando
+    directamente los buffers columnares.
+
+    Args:
+        df: DataFrame a escribir
+        path: Ruta del archivo de salida
+    """
+    pv.write_csv(pa.Table.from_pandas(df, preserve_index=False), str(path))